@@ -1,4 +1,7 @@
+import threading
+
 import cfg.config as config
+from agent.cancellation import CancelToken
 from agent.gpt_agent import GPTAgent
 from agent.gemini_agent import GeminiAgent
 from agent.deepseek_agent import DeepseekAgent
@@ -15,14 +18,69 @@ class AgentRouter:
     def __init__(self, ui, current_model):
         self.ui = ui
         self.current_model = current_model
-        self.current_agent = model_dict[current_model]()
-        
+        # agents stay constructed after a switch, keyed by model name
+        self.agents = {}
+        self.warming = set()
+        self.current_agent = self.agent(current_model)
+        self.inflight = {}
+
+    def agent(self, model):
+        agent = self.agents.get(model)
+        if agent is None:
+            agent = self.agents[model] = model_dict[model]()
+        return agent
+
     def switch_model(self, new_model):
         if new_model!=self.current_model and new_model in model_dict:
             self.current_model = new_model
-            del self.current_agent
-            self.current_agent = model_dict[new_model]()
+            self.current_agent = self.agent(new_model)
+
+    def prewarm(self, model=None):
+        """Connect to the model's provider on a background thread.
+
+        Called when a model is selected or the user starts typing, so the
+        handshake is done before the message is sent.
+        """
+        model = model or self.current_model
+        if model not in model_dict or model in self.warming or not self.has_api_key(model):
+            return
+        self.warming.add(model)
+        agent = self.agent(model)
+
+        def run():
+            try:
+                agent.prewarm()
+            except Exception:
+                pass
+            finally:
+                self.warming.discard(model)
+        threading.Thread(target=run, daemon=True).start()
         
+    def fan_out_agents(self, models):
+        """Build a fresh agent for each requested model, for concurrent use."""
+        return {model: model_dict[model]() for model in models if model in model_dict}
+
+    def has_api_key(self, model):
+        return bool(getattr(config, f"{model.split('-')[0]}_API_KEY", ""))
+
+    def begin_request(self, key):
+        """Register an in-flight request and return its cancel token."""
+        token = CancelToken()
+        self.inflight[key] = token
+        return token
+
+    def end_request(self, key):
+        self.inflight.pop(key, None)
+
+    def cancel(self, key):
+        token = self.inflight.get(key)
+        if token is not None:
+            token.cancel()
+
+    def cancel_all(self):
+        for token in list(self.inflight.values()):
+            token.cancel()
+
     def route_return(self, msg):
         agent_reply = self.current_agent.send_message(msg)
         return agent_reply
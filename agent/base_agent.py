@@ -1,34 +1,180 @@
-from openai import OpenAI
+import time
+
+import cfg.config as config
+from agent import client_pool
+from agent import response_cache
+from agent import rate_limiter
+from agent.cancellation import RequestCancelled
+from agent.context_builder import build_context
+from agent import token_counter
+from agent.token_counter import count_message_tokens
+from storage import config_store
 
 
 class BaseAgent:
+    provider = None
+    system_prompt = 'You are a helpful assistant.'
+
     def __init__(self, type):
         self.type = type
         self.client = None
+        # settings are read once and again only after one of them changes
+        self.stale = True
+        config_store.subscribe(self._on_config_changed)
 
     def _setup_config(self):
         raise NotImplementedError
 
+    def _on_config_changed(self, changes):
+        if any(name.startswith((f"{self.provider}_", "HTTP")) for name in changes):
+            self.stale = True
+
     def _setup_client(self) -> None:
+        if not self.stale:
+            return
         self._setup_config()
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
-    
+        self.client = client_pool.get_client(self.base_url, self.api_key)
+        self.stale = False
+
+    def prewarm(self):
+        """Connect to the provider ahead of the first message, see client_pool.warm."""
+        self._setup_client()
+        return client_pool.warm(self.base_url, self.api_key)
+
+    def _context_budget(self):
+        return getattr(config, f"{self.provider}_CONTEXT_TOKENS", 4 * self.max_completion_tokens)
+
+    def _build_messages(self, message, history=None, memory=None):
+        return build_context(self.system_prompt, history or [], message, self._context_budget(), memory)
+
+    def _cache_key(self, messages):
+        # None (the default) caches only deterministic, temperature 0 requests
+        enabled = getattr(config, "RESPONSE_CACHE", None)
+        if enabled is None:
+            enabled = self.temperature == 0
+        if not enabled:
+            return None
+        return response_cache.make_key(self.type, self.base_url, self.temperature,
+                                       self.max_completion_tokens, messages)
+
+    def _timed(self, request, stats):
+        # time until the provider answers with response headers
+        def timed_request():
+            start = time.perf_counter()
+            response = request()
+            if stats is not None:
+                stats['headers'] = time.perf_counter() - start
+            return response
+        return timed_request
+
+    def _request_tokens(self, messages):
+        # what a tokens-per-minute limit charges: prompt plus the reply budget
+        return sum(count_message_tokens(m) for m in messages) + self.max_completion_tokens
+
     def send_message(self, message, **kwargs) -> str:
+        """Return the whole reply to ``message``.
+
+        With a ``cancel`` token the reply is received as a stream, which the
+        token can close mid-request; a plain completion could only be
+        abandoned after it arrived. A cancelled request raises
+        RequestCancelled.
+        """
+        stats = kwargs.get('stats')
+        cancel = kwargs.get('cancel')
+        if cancel is not None:
+            reply = "".join(self.stream_message(message, **kwargs))
+            if cancel.cancelled:
+                raise RequestCancelled()
+            return reply
         try:
             self._setup_client()
-            response = self.client.chat.completions.create(
-                model = self.type,
-                messages = [
-                    {'role': 'system', 'content': 'You are a helpful assistant.'},
-                    {'role': 'user', 'content': message}
-                ],
-                stream = False,
-                temperature = self.temperature,
-                max_completion_tokens = self.max_completion_tokens
-            )
-            return response.choices[0].message.content
+            messages = self._build_messages(message, kwargs.get('history'), kwargs.get('memory'))
+            key = self._cache_key(messages)
+            cached = response_cache.get(key) if key else None
+            if cached is not None:
+                if stats is not None:
+                    stats['cached'] = True
+                return cached
+
+            scheduler = rate_limiter.get_scheduler(self.provider)
+            with scheduler.slot():
+                response = scheduler.call(self._timed(lambda: self.client.chat.completions.create(
+                    model = self.type,
+                    messages = messages,
+                    stream = False,
+                    temperature = self.temperature,
+                    max_completion_tokens = self.max_completion_tokens
+                ), stats), self._request_tokens(messages), cancel)
+            self._record_usage(response.usage, stats, messages)
+            reply = response.choices[0].message.content
+            if key:
+                response_cache.put(key, reply)
+            return reply
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    def _record_usage(self, usage, stats, messages):
+        if usage is None:
+            return
+        token_counter.calibrate(self.provider, messages, usage.prompt_tokens)
+        if stats is not None:
+            stats['prompt_tokens'] = usage.prompt_tokens
+            stats['completion_tokens'] = usage.completion_tokens
+
+    def stream_message(self, message, **kwargs):
+        """Yield the reply as text deltas while the provider generates it.
+
+        A ``cancel`` token closes the HTTP stream when cancelled; the
+        generator then ends quietly after the deltas received so far.
+        """
+        stats = kwargs.get('stats')
+        cancel = kwargs.get('cancel')
+        self._setup_client()
+        messages = self._build_messages(message, kwargs.get('history'), kwargs.get('memory'))
+        key = self._cache_key(messages)
+        cached = response_cache.get(key) if key else None
+        if cached is not None:
+            if stats is not None:
+                stats['cached'] = True
+            yield cached
+            return
+
+        scheduler = rate_limiter.get_scheduler(self.provider)
+        parts = []
+        with scheduler.slot():
+            try:
+                stream = scheduler.call(self._timed(lambda: self.client.chat.completions.create(
+                    model = self.type,
+                    messages = messages,
+                    stream = True,
+                    stream_options = {'include_usage': True},
+                    temperature = self.temperature,
+                    max_completion_tokens = self.max_completion_tokens
+                ), stats), self._request_tokens(messages), cancel)
+            except RequestCancelled:
+                return
+            if cancel is not None:
+                cancel.attach(stream)
+            try:
+                for chunk in stream:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    if chunk.usage is not None:
+                        self._record_usage(chunk.usage, stats, messages)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            except Exception:
+                if cancel is None or not cancel.cancelled:
+                    raise
+            finally:
+                if cancel is not None:
+                    cancel.detach(stream)
+                stream.close()
+        if cancel is not None and cancel.cancelled:
+            return
+        if key:
+            response_cache.put(key, "".join(parts))
@@ -0,0 +1,45 @@
+import threading
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class CancelToken:
+    """Lets the UI thread abort a request running on a worker thread.
+
+    Agents attach their open response streams; ``cancel`` closes them at
+    once, which also unblocks workers that are waiting for the next chunk.
+    One token can cover several concurrent requests, like the chunks of a
+    file ingest.
+    """
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.streams = set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+    def cancel(self):
+        with self.lock:
+            self.event.set()
+            streams, self.streams = self.streams, set()
+        for stream in streams:
+            stream.close()
+
+    def attach(self, stream):
+        with self.lock:
+            if not self.event.is_set():
+                self.streams.add(stream)
+                return
+        stream.close()
+
+    def detach(self, stream):
+        with self.lock:
+            self.streams.discard(stream)
+
+    def sleep(self, seconds):
+        if self.event.wait(seconds):
+            raise RequestCancelled()
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import cfg.config as config
+from storage import config_store
+
+_clients = {}
+_http_clients = {}
+_warmed = {}
+_lock = threading.Lock()
+
+
+def _http2_enabled():
+    if not getattr(config, "HTTP2", False):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_http_client():
+    import httpx
+    return httpx.Client(
+        http2=_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=getattr(config, "HTTP_MAX_CONNECTIONS", 10),
+            max_keepalive_connections=getattr(config, "HTTP_MAX_KEEPALIVE", 5),
+            keepalive_expiry=getattr(config, "HTTP_KEEPALIVE_EXPIRY", 120.0),
+        ),
+        timeout=httpx.Timeout(
+            getattr(config, "HTTP_TIMEOUT", 600.0),
+            connect=getattr(config, "HTTP_CONNECT_TIMEOUT", 10.0),
+        ),
+    )
+
+
+def get_client(base_url, api_key):
+    """Return the shared OpenAI client for (base_url, api_key).
+
+    Clients keep their httpx connection pool alive between messages, so
+    consecutive turns to the same provider reuse the TCP/TLS connection.
+    """
+    key = (base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            # openai takes most of a second to import, so it waits for the first request
+            from openai import OpenAI
+            # retries are scheduled by agent.rate_limiter, not the SDK
+            http_client = _build_http_client()
+            client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                max_retries=0,
+                http_client=http_client
+            )
+            _clients[key] = client
+            _http_clients[key] = http_client
+        return client
+
+
+def warm(base_url, api_key):
+    """Open a pooled connection to base_url before the first request needs it.
+
+    A HEAD request pays for DNS, TCP and TLS up front; whatever it answers,
+    the connection stays in the keep-alive pool for the next completion.
+    Does nothing if the pair was warmed within the keep-alive window.
+    """
+    import httpx
+    get_client(base_url, api_key)
+    key = (base_url, api_key)
+    now = time.monotonic()
+    with _lock:
+        http_client = _http_clients.get(key)
+        if http_client is None or now - _warmed.get(key, float("-inf")) < getattr(config, "HTTP_KEEPALIVE_EXPIRY", 120.0):
+            return False
+        _warmed[key] = now
+    try:
+        http_client.head(base_url, timeout=getattr(config, "HTTP_CONNECT_TIMEOUT", 10.0))
+    except httpx.HTTPError:
+        with _lock:
+            _warmed.pop(key, None)
+        return False
+    return True
+
+
+def invalidate(base_url=None, api_key=None):
+    """Drop the cached clients matching base_url and/or api_key.
+
+    Dropped clients are not closed here, a request still streaming on
+    one of them finishes normally and its pool is released with it.
+    """
+    with _lock:
+        for key in list(_clients):
+            if (base_url is None or key[0] == base_url) and (api_key is None or key[1] == api_key):
+                del _clients[key]
+                _http_clients.pop(key, None)
+                _warmed.pop(key, None)
+
+
+def close_all():
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _http_clients.clear()
+        _warmed.clear()
+    for client in clients:
+        client.close()
+
+
+def _on_config_changed(changes):
+    for name, (old, new) in changes.items():
+        if name.endswith("_API_KEY") and old:
+            invalidate(api_key=old)
+        elif name.startswith("HTTP"):
+            invalidate()
+
+
+config_store.subscribe(_on_config_changed)
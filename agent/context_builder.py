@@ -0,0 +1,51 @@
+from agent.token_counter import count_tokens, count_message_tokens
+
+ROLES = {'user': 'user', 'bot': 'assistant'}
+
+
+def _head(text, budget):
+    """Longest beginning of ``text`` that counts at most ``budget`` tokens."""
+    # uncached, the prefixes tried here would only crowd out whole messages
+    count = count_tokens.__wrapped__
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def build_context(system_prompt, history, message, budget, memory=None):
+    """Assemble the chat completion messages for one turn.
+
+    Prior turns from ``history`` are added newest first until ``budget``
+    tokens are used; the first turn that does not fit is collapsed to its
+    beginning if there is room left, and everything older is dropped.
+    ``memory`` holds excerpts retrieved from other chats, they are appended
+    to the system prompt and count against the budget before any history.
+    """
+    if memory:
+        system_prompt += "\n\nExcerpts from earlier conversations that may be relevant:\n" + \
+                         "\n".join(f"- {excerpt}" for excerpt in memory)
+    messages = [{'role': 'user', 'content': message}]
+    remaining = budget - count_tokens(system_prompt) - count_tokens(message)
+
+    for past in reversed(history):
+        role = ROLES.get(past['sender'])
+        if role is None:
+            continue
+        cost = count_message_tokens(past)
+        if cost <= remaining:
+            messages.append({'role': role, 'content': past['content']})
+            remaining -= cost
+            continue
+        if remaining > 64:
+            keep = _head(past['content'], remaining - 16)
+            messages.append({'role': role, 'content': keep + "\n[... truncated]"})
+        break
+
+    messages.append({'role': 'system', 'content': system_prompt})
+    messages.reverse()
+    return messages
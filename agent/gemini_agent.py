@@ -2,6 +2,8 @@ from agent.base_agent import BaseAgent
 import cfg.config as config
 
 class GeminiAgent(BaseAgent):    
+    provider = "Gemini"
+
     def __init__(self, type):
         super().__init__(type)
 
@@ -0,0 +1,148 @@
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from agent import response_cache
+from agent.cancellation import RequestCancelled
+from agent.token_counter import count_tokens
+
+# the map prompt holds nothing but the instruction and the chunk, so a chunk's
+# cached answer survives edits elsewhere in the file, renames and new chunks
+MAP_PROMPT = ("{instruction}\n\nThis is one part of a longer file. "
+              "Answer for this part only.\n\n-----\n{chunk}")
+REDUCE_PROMPT = ("{instruction}\n\nThe file {name} was processed in {total} parts; "
+                 "these are the answers for each part. Merge them into one answer.\n\n{answers}")
+
+# token counts of file lines are not worth a slot in the per-message cache
+_estimate = count_tokens.__wrapped__
+
+
+def read_lines(path, block_size=1 << 20):
+    """Yield the lines of a text file, reading it a block at a time."""
+    with open(path, encoding="utf-8", errors="replace", newline="") as f:
+        rest = ""
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines = (rest + block).splitlines(keepends=True)
+            rest = lines.pop() if not lines[-1].endswith(("\n", "\r")) else ""
+            yield from lines
+        if rest:
+            yield rest
+
+
+def split_chunks(lines, budget):
+    """Group lines into chunks of at most ``budget`` estimated tokens.
+
+    Chunks end on line boundaries; a single line longer than the budget is
+    cut into pieces of the right size. Past half the budget a chunk also
+    ends after any line whose hash has its low bits clear, so the chunk
+    borders depend on the text around them rather than on the file offset
+    and an edit only changes the chunks it touches.
+    """
+    parts, used = [], 0
+    for line in lines:
+        tokens = _estimate(line)
+        while tokens > budget:
+            if parts:
+                yield "".join(parts)
+                parts, used = [], 0
+            cut = max(1, len(line) * budget // tokens)
+            yield line[:cut]
+            line = line[cut:]
+            tokens = _estimate(line)
+        if used + tokens > budget and parts:
+            yield "".join(parts)
+            parts, used = [], 0
+        parts.append(line)
+        used += tokens
+        if used * 2 >= budget and zlib.crc32(line.encode("utf-8")) & 15 == 0:
+            yield "".join(parts)
+            parts, used = [], 0
+    if parts:
+        yield "".join(parts)
+
+
+def _ask(agent, prompt, cancel):
+    """Send one prompt, answering from the response cache when possible.
+
+    Keys are the same request hash BaseAgent uses, so a chunk that did not
+    change since the last run is not sent again.
+    """
+    agent._setup_client()
+    key = response_cache.make_key(agent.type, agent.base_url, agent.temperature,
+                                  agent.max_completion_tokens, agent._build_messages(prompt))
+    reply = response_cache.get(key)
+    if reply is None:
+        reply = agent.send_message(prompt, cancel=cancel)
+        if cancel is None or not cancel.cancelled:
+            response_cache.put(key, reply)
+    return reply
+
+
+def _groups(answers, budget):
+    # at least two answers per group, so every reduce round shrinks the list
+    group, used = [], 0
+    for i, answer in enumerate(answers):
+        text = f"[part {i + 1}]\n{answer.strip()}\n\n"
+        tokens = _estimate(text)
+        if len(group) >= 2 and used + tokens > budget:
+            yield "".join(group)
+            group, used = [], 0
+        group.append(text)
+        used += tokens
+    if group:
+        yield "".join(group)
+
+
+def map_reduce(agent, path, instruction, chunk_tokens=2000, concurrency=4, progress=None, cancel=None):
+    """Run ``instruction`` over a file of any size and return the merged answer.
+
+    The file is streamed into chunks and up to ``concurrency`` chunks are
+    sent at a time (map), the next one read only as a request finishes,
+    so only the answers are held in memory. The answers are then merged in
+    groups that fit the chunk budget (reduce) until one answer is left.
+    ``progress(done, total)`` is called after every request, ``total``
+    grows as chunks are read and reduce rounds are added.
+    """
+    name = os.path.basename(path)
+    count = {'done': 0, 'total': 0}
+
+    def collect(pending, answers):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if cancel is not None and cancel.cancelled:
+                raise RequestCancelled()
+            answers[pending.pop(future)] = future.result()
+            count['done'] += 1
+            if progress is not None:
+                progress(count['done'], count['total'])
+
+    def run(prompts):
+        answers, pending = {}, {}
+        pool = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            for i, prompt in enumerate(prompts):
+                if cancel is not None and cancel.cancelled:
+                    raise RequestCancelled()
+                pending[pool.submit(_ask, agent, prompt, cancel)] = i
+                count['total'] += 1
+                if len(pending) >= concurrency:
+                    collect(pending, answers)
+            while pending:
+                collect(pending, answers)
+        finally:
+            # once cancelled, requests still in flight end on their own as the token closes their streams
+            pool.shutdown(wait=False, cancel_futures=True)
+        return [answers[i] for i in range(len(answers))]
+
+    answers = run(MAP_PROMPT.format(instruction=instruction, chunk=chunk)
+                  for chunk in split_chunks(read_lines(path), chunk_tokens))
+    if not answers:
+        return ""
+    total = len(answers)
+    while len(answers) > 1:
+        answers = run(REDUCE_PROMPT.format(instruction=instruction, total=total, name=name, answers=group)
+                      for group in _groups(answers, chunk_tokens))
+    return answers[0]
@@ -0,0 +1,153 @@
+import email.utils
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import cfg.config as config
+from storage import config_store
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units evenly over a minute.
+
+    ``reserve`` takes the units right away, letting the balance go
+    negative, and returns how long the caller has to wait for it to be
+    paid back; concurrent callers therefore queue up in arrival order.
+    """
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+
+def retry_after(error):
+    """Seconds requested by a Retry-After / retry-after-ms header, if any."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            date = email.utils.parsedate_to_datetime(value)
+            return max(0.0, date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    import openai
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class ProviderScheduler:
+    """Request scheduling for one provider.
+
+    Caps concurrent requests, paces requests and tokens per minute, and
+    retries throttled or failed requests with exponential backoff and full
+    jitter, waiting at least as long as the provider's Retry-After asks.
+    """
+    def __init__(self, rpm=None, tpm=None, max_concurrent=8, max_retries=4, base_delay=1.0, max_delay=60.0):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = time.sleep
+
+    @contextmanager
+    def slot(self):
+        self.slots.acquire()
+        try:
+            yield
+        finally:
+            self.slots.release()
+
+    def backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        requested = retry_after(error)
+        if requested is not None:
+            delay = max(delay, requested)
+        return delay
+
+    def call(self, request, tokens=0, cancel=None):
+        sleep = cancel.sleep if cancel is not None else self.sleep
+        attempt = 0
+        while True:
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.reserve(1))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.reserve(tokens))
+            if wait:
+                sleep(wait)
+            try:
+                return request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                sleep(self.backoff(attempt, e))
+                attempt += 1
+
+
+_schedulers = {}
+_lock = threading.Lock()
+
+
+def get_scheduler(provider):
+    """Shared scheduler for a provider prefix (Deepseek, Gemini, ChatGPT)."""
+    with _lock:
+        scheduler = _schedulers.get(provider)
+        if scheduler is None:
+            scheduler = ProviderScheduler(
+                rpm=getattr(config, f"{provider}_RPM", None),
+                tpm=getattr(config, f"{provider}_TPM", None),
+                max_concurrent=getattr(config, f"{provider}_MAX_CONCURRENT", 8),
+                max_retries=getattr(config, "MAX_RETRIES", 4),
+                base_delay=getattr(config, "RETRY_BASE_DELAY", 1.0),
+                max_delay=getattr(config, "RETRY_MAX_DELAY", 60.0),
+            )
+            _schedulers[provider] = scheduler
+        return scheduler
+
+
+def reset(provider=None):
+    """Forget schedulers so changed limits are picked up on the next request."""
+    with _lock:
+        if provider is None:
+            _schedulers.clear()
+        else:
+            _schedulers.pop(provider, None)
+
+
+def _on_config_changed(changes):
+    for name in changes:
+        if name in ("MAX_RETRIES", "RETRY_BASE_DELAY", "RETRY_MAX_DELAY"):
+            reset()
+        elif name.endswith(("_RPM", "_TPM", "_MAX_CONCURRENT")):
+            reset(name.split("_", 1)[0])
+
+
+config_store.subscribe(_on_config_changed)
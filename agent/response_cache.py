@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(model, base_url, temperature, max_completion_tokens, messages):
+    payload = json.dumps([model, base_url, temperature, max_completion_tokens, messages],
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Completed replies keyed by request hash.
+
+    Lookups go to an in-memory LRU first and then to an optional SQLite
+    tier. Entries older than ``ttl`` seconds are ignored and removed, and
+    the disk tier drops least recently used replies beyond ``max_bytes``.
+    """
+    def __init__(self, max_entries=256, disk_path=None, ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = None
+        if disk_path:
+            folder = os.path.dirname(disk_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.conn = sqlite3.connect(disk_path, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                              "key TEXT PRIMARY KEY, reply TEXT NOT NULL, "
+                              "created REAL NOT NULL, used REAL NOT NULL, size INTEGER NOT NULL)")
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[0] > self.ttl:
+                del self.memory[key]
+                entry = None
+            if entry is None and self.conn is not None:
+                row = self.conn.execute("SELECT created, reply FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[0] > self.ttl:
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if row is not None:
+                    self.conn.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, reply):
+        now = time.time()
+        with self.lock:
+            self._remember(key, (now, reply))
+            if self.conn is not None:
+                self.conn.execute("INSERT OR REPLACE INTO responses (key, reply, created, used, size) "
+                                  "VALUES (?, ?, ?, ?, ?)", (key, reply, now, now, len(reply)))
+                self._trim_disk(now)
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _trim_disk(self, now):
+        self.conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY used").fetchall():
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.memory),
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_cache = ResponseCache()
+
+
+def configure(max_entries=256, disk_path=None, ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+    global _cache
+    _cache.close()
+    _cache = ResponseCache(max_entries, disk_path, ttl, max_bytes)
+
+
+def get(key):
+    return _cache.get(key)
+
+
+def put(key, reply):
+    _cache.put(key, reply)
+
+
+def stats():
+    return _cache.stats()
+
+
+def close():
+    _cache.close()
@@ -0,0 +1,124 @@
+import json
+import math
+import threading
+import time
+import uuid
+from collections import deque
+
+FIELDS = ('queue_wait', 'headers', 'ttft', 'total', 'tokens_per_sec')
+
+_records = deque(maxlen=10000)
+_lock = threading.Lock()
+
+
+def build_metrics(model, stats):
+    """Turn the stats a request worker collected into a metrics record."""
+    metrics = {
+        'id': uuid.uuid4().hex,
+        'model': model,
+        'time': time.time(),
+    }
+    for field in ('queue_wait', 'headers', 'ttft', 'total', 'prompt_tokens', 'completion_tokens'):
+        if stats.get(field) is not None:
+            metrics[field] = stats[field]
+    total = stats.get('total', 0.0)
+    generation = total - stats.get('ttft', 0.0)
+    if generation <= 0:
+        # a reply received whole (batch, ingest, non-streamed chat) has no
+        # first token before the rest, its rate is over the whole request
+        generation = total
+    if stats.get('completion_tokens') and generation > 0:
+        metrics['tokens_per_sec'] = stats['completion_tokens'] / generation
+    for flag in ('cached', 'cancelled'):
+        if stats.get(flag):
+            metrics[flag] = True
+    return metrics
+
+
+def record(metrics):
+    with _lock:
+        _records.append(metrics)
+
+
+def session_records():
+    with _lock:
+        return list(_records)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize(records):
+    """Per model request count, p50/p95 of every timing and token totals."""
+    by_model = {}
+    for metrics in records:
+        by_model.setdefault(metrics['model'], []).append(metrics)
+
+    summary = {}
+    for model, rows in sorted(by_model.items()):
+        entry = {
+            'requests': len(rows),
+            'prompt_tokens': sum(r.get('prompt_tokens', 0) for r in rows),
+            'completion_tokens': sum(r.get('completion_tokens', 0) for r in rows),
+        }
+        for field in FIELDS:
+            # cached replies and cancelled requests would skew the timings down
+            values = [r[field] for r in rows if field in r and not r.get('cached') and not r.get('cancelled')]
+            entry[field] = {
+                'p50': percentile(values, 0.5),
+                'p95': percentile(values, 0.95),
+                'sum': sum(values),
+                'count': len(values),
+            }
+        summary[model] = entry
+    return summary
+
+
+def export_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for metrics in records:
+            f.write(json.dumps(metrics, ensure_ascii=False) + "\n")
+
+
+def export_prometheus(path, records):
+    """Write the summary in the Prometheus text exposition format."""
+    summary = summarize(records)
+    lines = []
+    names = {
+        'queue_wait': "Time a request waited for a worker thread",
+        'headers': "Time until the provider answered with response headers",
+        'ttft': "Time to first token",
+        'total': "Total request latency",
+    }
+    for field, help_text in names.items():
+        metric = f"chatgui_{field}_seconds"
+        lines.append(f"# HELP {metric} {help_text}.")
+        lines.append(f"# TYPE {metric} summary")
+        for model, entry in summary.items():
+            stat = entry[field]
+            if not stat['count']:
+                continue
+            for q in ('p50', 'p95'):
+                quantile = "0.5" if q == 'p50' else "0.95"
+                lines.append(f'{metric}{{model="{model}",quantile="{quantile}"}} {stat[q]:.6f}')
+            lines.append(f'{metric}_sum{{model="{model}"}} {stat["sum"]:.6f}')
+            lines.append(f'{metric}_count{{model="{model}"}} {stat["count"]}')
+
+    for field in ('prompt_tokens', 'completion_tokens'):
+        metric = f"chatgui_{field}_total"
+        lines.append(f"# HELP {metric} {field.replace('_', ' ').capitalize()} reported by the provider.")
+        lines.append(f"# TYPE {metric} counter")
+        for model, entry in summary.items():
+            lines.append(f'{metric}{{model="{model}"}} {entry[field]}')
+
+    lines.append("# HELP chatgui_requests_total Requests sent per model.")
+    lines.append("# TYPE chatgui_requests_total counter")
+    for model, entry in summary.items():
+        lines.append(f'chatgui_requests_total{{model="{model}"}} {entry["requests"]}')
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
@@ -0,0 +1,74 @@
+import threading
+from functools import lru_cache
+
+
+@lru_cache(maxsize=65536)
+def count_tokens(text):
+    """Cheap token estimate, cached per message text.
+
+    Roughly four characters per token for Latin text and one token per
+    CJK character, which is close enough for budgeting the context.
+    """
+    wide = sum(1 for ch in text if ord(ch) > 0x2e7f)
+    return (len(text) - wide) // 4 + wide + 1
+
+
+def count_message_tokens(message):
+    # role and separators cost a few tokens per message
+    return count_tokens(message['content']) + 4
+
+
+# Per-provider counts: an exact tokenizer where one is installed (tiktoken
+# for ChatGPT), otherwise the estimate above scaled by a factor learned from
+# the prompt_tokens providers report back.
+_encodings = {}
+_scale = {}
+_lock = threading.Lock()
+ENCODINGS = {"ChatGPT": "o200k_base"}
+
+
+def _encoding(provider):
+    if provider not in _encodings:
+        encoding = None
+        if provider in ENCODINGS:
+            try:
+                import tiktoken
+                encoding = tiktoken.get_encoding(ENCODINGS[provider])
+            except Exception:
+                # tiktoken is optional and may need to download its tables
+                encoding = None
+        _encodings[provider] = encoding
+    return _encodings[provider]
+
+
+def is_exact(provider):
+    return _encoding(provider) is not None
+
+
+@lru_cache(maxsize=65536)
+def _exact_count(text, provider):
+    return len(_encoding(provider).encode(text, disallowed_special=()))
+
+
+def count(text, provider=None):
+    """Tokens of ``text`` for ``provider``, cached per text."""
+    if provider is not None and is_exact(provider):
+        return _exact_count(text, provider)
+    return round(count_tokens(text) * _scale.get(provider, 1.0))
+
+
+def num_tokens_from_messages(messages, provider=None):
+    # every message carries its role and separators, and the reply is primed with a few more
+    return sum(count(m['content'], provider) + 4 for m in messages) + 3
+
+
+def calibrate(provider, messages, prompt_tokens):
+    """Move the provider's scale toward what it actually billed for ``messages``."""
+    if not prompt_tokens or provider is None or is_exact(provider):
+        return
+    estimate = sum(count_tokens(m['content']) for m in messages)
+    overhead = 4 * len(messages) + 3
+    ratio = min(2.0, max(0.5, (prompt_tokens - overhead) / max(1, estimate)))
+    with _lock:
+        old = _scale.get(provider)
+        _scale[provider] = ratio if old is None else 0.8 * old + 0.2 * ratio
@@ -0,0 +1,161 @@
+"""Headless batch mode: run a JSONL file of prompts against one or more models.
+
+    python -m batch prompts.jsonl --models ChatGPT Deepseek-V3 --concurrency 8
+    python main.py --batch prompts.jsonl --models ChatGPT
+
+Each input line is a JSON object with a ``prompt`` and optionally an ``id``
+(the line number otherwise) and a ``history`` of earlier messages in the
+``{'sender', 'content'}`` form the chat window stores. Every finished
+request is appended to the output file straight away, one line per
+(id, model). Running the same command again skips the pairs that already
+have a reply, so an interrupted batch picks up where it stopped and only
+failed rows are retried.
+
+Nothing here imports PySide6.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import cfg.config as config
+from agent import client_pool
+from agent import telemetry
+from agent.agent_router import AgentRouter, model_dict
+from storage import config_store
+
+
+def read_prompts(path):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if isinstance(row, str):
+                row = {"prompt": row}
+            row.setdefault("id", line_no)
+            yield row
+
+
+def completed(path):
+    """(id, model) pairs that already have a reply in the output file."""
+    done = set()
+    if not os.path.isfile(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # a line cut short when the previous run was killed
+                continue
+            if "reply" in row:
+                done.add((row["id"], row["model"]))
+    return done
+
+
+def run_one(router, row, model, submitted):
+    agent = router.agent(model)
+    key = (row["id"], model)
+    cancel = router.begin_request(key)
+    start = time.perf_counter()
+    stats = {'model': agent.type, 'queue_wait': start - submitted}
+    result = {"id": row["id"], "model": model}
+    try:
+        result["reply"] = agent.send_message(row["prompt"], history=row.get("history"),
+                                             stats=stats, cancel=cancel)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        router.end_request(key)
+    stats['total'] = time.perf_counter() - start
+    stats['ttft'] = stats['total']
+    result["metrics"] = telemetry.build_metrics(agent.type, stats)
+    return result
+
+
+def run_batch(router, input_path, output_path, models, concurrency=4, log=print):
+    """Run every prompt against every model, appending results to ``output_path``.
+
+    At most ``concurrency`` requests are in flight; provider rate limits
+    still apply on top through each agent's scheduler. Returns the number
+    of results written by this run.
+    """
+    done = completed(output_path)
+    tasks = ((row, model) for row in read_prompts(input_path) for model in models
+             if (row["id"], model) not in done)
+
+    # one agent per model, shared by its rows; built here so the workers only look it up
+    for model in models:
+        router.agent(model)
+    written = failed = 0
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        try:
+            for row, model in tasks:
+                # keep the queue short so huge inputs are read as they are consumed
+                if len(pending) >= 2 * concurrency:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        failed += _write(out, future.result())
+                        written += 1
+                pending.add(pool.submit(run_one, router, row, model, time.perf_counter()))
+            for future in _as_finished(pending):
+                failed += _write(out, future.result())
+                written += 1
+        except KeyboardInterrupt:
+            log("interrupted, cancelling requests in flight ...")
+            router.cancel_all()
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            client_pool.close_all()
+    log(f"{written} results written to {output_path} ({failed} failed, {len(done)} done before)")
+    return written
+
+
+def _as_finished(pending):
+    while pending:
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        yield from finished
+
+
+def _write(out, result):
+    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    out.flush()
+    return "error" in result
+
+
+def main(argv=None):
+    config_store.configure(config, "cfg/config.json")
+    parser = argparse.ArgumentParser(prog="batch", description="Run JSONL prompts headless")
+    parser.add_argument("input", help="JSONL file with one prompt per line")
+    parser.add_argument("-o", "--output", help="JSONL results, default <input>.out.jsonl")
+    parser.add_argument("-m", "--models", nargs="+", default=[config.models[0]],
+                        help=f"models to run, from: {', '.join(model_dict)}")
+    parser.add_argument("-c", "--concurrency", type=int,
+                        default=getattr(config, "MAX_CONCURRENT_REQUESTS", 16) // 4)
+    args = parser.parse_args(argv)
+
+    unknown = [m for m in args.models if m not in model_dict]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+    router = AgentRouter(None, args.models[0])
+    missing = [m for m in args.models if not router.has_api_key(m)]
+    if missing:
+        parser.error(f"no API key configured for: {', '.join(missing)}")
+
+    output = args.output or os.path.splitext(args.input)[0] + ".out.jsonl"
+    try:
+        run_batch(router, args.input, output, args.models, max(1, args.concurrency))
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""Save/load cost of the SQLite history store against the legacy joblib pickle.
+
+    python -m benchmarks.bench_hist_store
+"""
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+
+from benchmarks.synthetic import make_history
+from storage.hist_store import HistStore
+
+
+def bench(n_messages, folder):
+    hist = make_history(n_messages)
+    result = {"messages": n_messages}
+
+    pkl_path = os.path.join(folder, f"hist_{n_messages}.pkl")
+    start = time.perf_counter()
+    joblib.dump(hist, pkl_path)
+    result["pickle_save_all_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    joblib.load(pkl_path)
+    result["pickle_load_s"] = time.perf_counter() - start
+
+    store = HistStore(os.path.join(folder, f"hist_{n_messages}.db"))
+    start = time.perf_counter()
+    store.migrate_pickle(pkl_path)
+    result["sqlite_migrate_s"] = time.perf_counter() - start
+
+    # cost of persisting one more message on top of the existing history
+    chat_id = store.next_id()
+    store.create_chat(chat_id, "bench")
+    rounds = 200
+    start = time.perf_counter()
+    for i in range(rounds):
+        store.append_message(chat_id, 'user', "one more message", "00:00:00")
+    result["sqlite_append_one_s"] = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    store.load_all()
+    result["sqlite_load_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    store.load_index()
+    result["sqlite_load_index_s"] = time.perf_counter() - start
+    store.close()
+    return result
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000, 100_000))
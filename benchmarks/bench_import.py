@@ -0,0 +1,76 @@
+"""Import cost of ``main`` measured with ``python -X importtime``.
+
+With ``--check`` this is the startup regression check: it exits with
+status 1 when importing main takes longer than the budget or pulls in a
+module that should only load after the window has painted.
+
+    python -m benchmarks.bench_import [--check] [--budget SECONDS]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_startup import ROOT
+
+# loaded after first paint by ChatWidget.finish_setup or on first use
+DEFERRED = ("openai", "httpx", "markdown", "joblib", "numpy")
+BUDGET_S = 0.8
+
+
+def import_times():
+    """{module: (self_s, cumulative_s)} for a fresh ``import main``."""
+    with tempfile.TemporaryDirectory() as folder:
+        os.makedirs(os.path.join(folder, "cfg"))
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                              cwd=folder, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own) / 1e6, int(cumulative) / 1e6)
+    return times
+
+
+def bench(budget=BUDGET_S):
+    times = import_times()
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    return {
+        "main_import_s": times["main"][1],
+        "budget_s": budget,
+        "modules": len(times),
+        "deferred_imported": [name for name in DEFERRED if name in times],
+        "slowest_self_s": {name: own for name, (own, _) in slowest},
+    }
+
+
+def check(result):
+    problems = []
+    if result["main_import_s"] > result["budget_s"]:
+        problems.append(f"import main took {result['main_import_s']:.3f}s, budget {result['budget_s']:.3f}s")
+    for name in result["deferred_imported"]:
+        problems.append(f"{name} is imported before the window paints")
+    return problems
+
+
+def main(sizes=(), budget=BUDGET_S):
+    # history size does not matter here, sizes is accepted for benchmarks.run
+    result = bench(budget)
+    print(f"main_import_s={result['main_import_s']:.6f} budget_s={budget:.6f} "
+          f"modules={result['modules']} deferred_imported={','.join(result['deferred_imported']) or '-'}")
+    return [result]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="exit 1 when over budget")
+    parser.add_argument("--budget", type=float, default=BUDGET_S, help="seconds allowed for import main")
+    args = parser.parse_args()
+    result = main(budget=args.budget)[0]
+    problems = check(result) if args.check else []
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,77 @@
+"""Resident size of a loaded history: legacy message dicts against ``Message``.
+
+    python -m benchmarks.bench_memory [n_messages ...]
+
+Both layouts are read from the same synthetic database, every other
+message a reply carrying request metrics like the ones the app stores.
+``overhead`` is what a message costs beyond its text.
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.synthetic import make_workspace
+from storage.hist_store import HistStore
+
+META = {'metrics': {'id': "0" * 32, 'model': "gpt-4o-mini", 'time': 1.7e9, 'queue_wait': 0.001, 'headers': 0.12,
+                    'ttft': 0.45, 'total': 3.2, 'prompt_tokens': 812, 'completion_tokens': 356,
+                    'tokens_per_sec': 129.4}}
+
+
+def load_legacy(store):
+    """The pre-``Message`` layout: one dict per message, metadata parsed up front."""
+    chats = {}
+    for chat_id, sender, content, time_str, meta in store.conn.execute(
+            "SELECT chat_id, sender, content, time, meta FROM messages ORDER BY id"):
+        message = {'sender': sender, 'content': content, 'time': time_str}
+        if meta:
+            message['meta'] = json.loads(meta)
+        chats.setdefault(chat_id, []).append(message)
+    return chats
+
+
+def measure(load):
+    gc.collect()
+    tracemalloc.start()
+    history = load()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return history, size
+
+
+def bench(n_messages, folder):
+    workspace = os.path.join(folder, f"memory_{n_messages}")
+    store = HistStore(make_workspace(workspace, n_messages))
+    with store.lock:
+        store.conn.execute("UPDATE messages SET meta = ? WHERE sender = 'bot'", (json.dumps(META),))
+    result = {"messages": n_messages}
+
+    history, legacy = measure(lambda: load_legacy(store))
+    text = sum(sys.getsizeof(m['content']) for chat in history.values() for m in chat)
+    del history
+    history, compact = measure(store.load_all)
+    del history
+
+    result["legacy_bytes_per_message"] = legacy / n_messages
+    result["compact_bytes_per_message"] = compact / n_messages
+    result["legacy_overhead_per_message"] = (legacy - text) / n_messages
+    result["compact_overhead_per_message"] = (compact - text) / n_messages
+    store.close()
+    return result
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000, 100_000))
@@ -0,0 +1,59 @@
+"""Markdown render cost with and without the render cache.
+
+Renders every assistant message of a synthetic history the way the
+transcript does when a chat is opened: once cold, once more from memory
+(chat switch) and once from the disk tier only (restart).
+
+    python -m benchmarks.bench_render_cache [n_messages]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import markdown
+
+from benchmarks.synthetic import make_history
+from storage.render_cache import RenderCache
+
+
+def bench(n_messages, folder):
+    hist = make_history(n_messages)
+    contents = [m['content'] for chat in hist['chats'].values()
+                for m in chat['messages'] if m['sender'] == 'bot']
+    result = {"messages": n_messages, "rendered": len(contents)}
+
+    start = time.perf_counter()
+    for content in contents:
+        markdown.markdown(content)
+    result["uncached_s"] = time.perf_counter() - start
+
+    cache = RenderCache(disk_path=os.path.join(folder, f"render_{n_messages}.db"))
+    for label in ("cold_s", "memory_s"):
+        start = time.perf_counter()
+        for content in contents:
+            cache.render(content)
+        result[label] = time.perf_counter() - start
+
+    cache.clear_memory()
+    start = time.perf_counter()
+    for content in contents:
+        cache.render(content)
+    result["disk_s"] = time.perf_counter() - start
+    result.update(cache.stats())
+    cache.close()
+    return result
+
+
+def main(sizes=(1_000, 10_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000))
@@ -0,0 +1,50 @@
+"""Full-text search latency over a synthetic history.
+
+    python -m benchmarks.bench_search [n_messages]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+
+from benchmarks.synthetic import make_history
+from storage.hist_store import HistStore
+
+QUERIES = ["python", "cache latency", "stream tok", "fib", "render history window", "nothingmatches"]
+
+
+def bench(n_messages, folder):
+    pkl_path = os.path.join(folder, f"hist_{n_messages}.pkl")
+    joblib.dump(make_history(n_messages), pkl_path)
+    store = HistStore(os.path.join(folder, f"hist_{n_messages}.db"))
+    start = time.perf_counter()
+    store.migrate_pickle(pkl_path)
+    result = {"messages": n_messages, "import_and_index_s": time.perf_counter() - start}
+
+    worst = 0.0
+    for query in QUERIES:
+        start = time.perf_counter()
+        hits = store.search(query)
+        elapsed = time.perf_counter() - start
+        worst = max(worst, elapsed)
+        result[f"query[{query}]_s"] = elapsed
+        result[f"query[{query}]_hits"] = len(hits)
+    result["worst_query_s"] = worst
+    store.close()
+    return result
+
+
+def main(sizes=(10_000, 100_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (10_000, 100_000))
@@ -0,0 +1,81 @@
+"""Time from launching ``main.py`` to the first paint of the main window.
+
+Each run starts a fresh interpreter on a synthetic workspace, so the
+numbers include imports, loading the history and opening the newest chat.
+
+    python -m benchmarks.bench_startup [n_messages]
+"""
+import os
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_workspace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = "first_paint_s="
+
+
+def probe():
+    """Run main.py in this process and exit once its window has painted."""
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    from PySide6.QtCore import QObject, QEvent
+    from PySide6.QtWidgets import QApplication, QMainWindow
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and isinstance(obj, QMainWindow):
+                print(f"{MARKER}{time.perf_counter() - start:.6f}", flush=True)
+                QApplication.instance().removeEventFilter(self)
+                QApplication.instance().quit()
+            return False
+
+    exec_ = QApplication.exec
+    def exec_until_painted(app):
+        app.installEventFilter(first_paint)
+        return exec_()
+    first_paint = FirstPaint()
+    QApplication.exec = exec_until_painted
+    runpy.run_path(os.path.join(ROOT, "main.py"), run_name="__main__")
+
+
+def bench(n_messages, folder, long_chat=0, rounds=3):
+    workspace = os.path.join(folder, f"startup_{n_messages}")
+    make_workspace(workspace, n_messages, long_chat)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=ROOT)
+    result = {"messages": n_messages}
+    wall, in_process = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_startup", "--probe"],
+                                cwd=workspace, env=env, stdout=subprocess.PIPE, text=True)
+        for line in proc.stdout:
+            if line.startswith(MARKER):
+                wall.append(time.perf_counter() - start)
+                in_process.append(float(line[len(MARKER):]))
+        proc.wait()
+    if not wall:
+        raise RuntimeError("main.py exited before its window was painted")
+    result["process_to_first_paint_s"] = min(wall)
+    result["import_to_first_paint_s"] = min(in_process)
+    return result
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ["--probe"]:
+        probe()
+    else:
+        main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000, 100_000))
@@ -0,0 +1,83 @@
+"""Transcript view cost against chat length, run offscreen.
+
+Times opening a chat scrolled to the bottom, paging up through it and
+streaming a reply into the live row. All three should stay flat as the
+chat grows, since only the rows on screen are laid out.
+
+    python -m benchmarks.bench_transcript [n_messages ...]
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QScrollBar
+
+from benchmarks.synthetic import make_message
+from ui.transcriptView import TranscriptView
+
+PAGE_UPS = 20
+TICKS = 30
+
+
+def _painted(widget):
+    QApplication.processEvents()
+    widget.viewport().repaint()
+    QApplication.processEvents()
+
+
+def bench(n_messages):
+    app = QApplication.instance() or QApplication(sys.argv)
+    rng = random.Random(0)
+    messages = [make_message(rng, i) for i in range(n_messages)]
+    view = TranscriptView()
+    view.resize(900, 700)
+    view.show()
+    # fonts, markdown and the render cache load on first use, keep that out of the timings
+    view.transcript.set_messages(messages[:50])
+    _painted(view)
+    result = {"messages": n_messages}
+
+    start = time.perf_counter()
+    view.transcript.set_messages(messages)
+    view.scrollToBottom()
+    _painted(view)
+    result["open_s"] = time.perf_counter() - start
+
+    scrollbar = view.verticalScrollBar()
+    start = time.perf_counter()
+    for _ in range(PAGE_UPS):
+        scrollbar.triggerAction(QScrollBar.SliderPageStepSub)
+        _painted(view)
+    result["page_up_s"] = (time.perf_counter() - start) / PAGE_UPS
+
+    view.scrollToBottom()
+    view.transcript.begin_live("00:00:00")
+    _painted(view)
+    start = time.perf_counter()
+    for i in range(TICKS):
+        view.transcript.append_live(f"token {i} of a reply that keeps growing, " * 3 + ("\n" if i % 5 == 0 else ""))
+        view.scrollToBottom()
+        _painted(view)
+    result["stream_tick_s"] = (time.perf_counter() - start) / TICKS
+    view.transcript.end_live()
+
+    view.close()
+    view.deleteLater()
+    app.processEvents()
+    return result
+
+
+def main(sizes=(1_000, 10_000, 40_000)):
+    results = []
+    for n in sizes:
+        result = bench(n)
+        results.append(result)
+        print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000, 40_000))
@@ -0,0 +1,140 @@
+"""Chat window hot paths on a synthetic history, run offscreen.
+
+Times building the window (``setupConfig`` included), reloading the
+history with ``setupConfig`` alone, opening a long chat, sidebar search
+through ``filter_conversations`` and the ``AboutQuit`` save on exit,
+then the sidebar alone with one chat per message of the history.
+
+    python -m benchmarks.bench_ui [n_messages]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from benchmarks.synthetic import make_workspace
+from ui.conversationList import ConversationList
+
+QUERIES = ["python", "cache latency", "render history window", "nothingmatches"]
+
+
+def _painted(widget):
+    QApplication.processEvents()
+    widget.repaint()
+    QApplication.processEvents()
+
+
+def bench_sidebar(n_chats):
+    result = {}
+    now = time.time()
+    chats = {i: {"title": f"Chat {i} about python cache", "updated": now - n_chats + i, "count": 1}
+             for i in range(1, n_chats + 1)}
+    start = time.perf_counter()
+    sidebar = ConversationList()
+    sidebar.resize(250, 800)
+    sidebar.set_chats(chats)
+    sidebar.show()
+    _painted(sidebar)
+    result["sidebar_open_s"] = time.perf_counter() - start
+
+    # bump a visible chat and a chat not fetched yet to the top
+    rounds = 100
+    start = time.perf_counter()
+    for i in range(rounds):
+        chat_id = n_chats - 10 - i % 2 * (n_chats // 2)
+        chats[chat_id]['title'] = f"renamed {i}"
+        chats[chat_id]['updated'] = now + i
+        sidebar.update_chat(chat_id)
+    result["sidebar_update_one_s"] = (time.perf_counter() - start) / rounds
+
+    # typed one key at a time, as the search box hands it over
+    query = "chat 12"
+    worst = 0.0
+    for typed in range(1, len(query) + 1):
+        start = time.perf_counter()
+        sidebar.set_filter(query[:typed])
+        _painted(sidebar)
+        worst = max(worst, time.perf_counter() - start)
+    result["sidebar_filter_key_worst_s"] = worst
+    start = time.perf_counter()
+    sidebar.set_filter("")
+    _painted(sidebar)
+    result["sidebar_filter_clear_s"] = time.perf_counter() - start
+    sidebar.deleteLater()
+    return result
+
+
+def bench(n_messages, folder, long_chat=5_000):
+    app = QApplication.instance() or QApplication(sys.argv)
+    workspace = os.path.join(folder, f"ui_{n_messages}")
+    make_workspace(workspace, n_messages, long_chat)
+    cwd = os.getcwd()
+    os.chdir(workspace)
+    try:
+        import main
+        import cfg.config as config
+        from ui.mainWindow import MainWindow
+        result = {"messages": n_messages, "long_chat": long_chat}
+
+        start = time.perf_counter()
+        window = MainWindow()
+        _painted(window)
+        while not window.chat_widget.ready:
+            QApplication.processEvents()
+        result["main_window_s"] = time.perf_counter() - start
+        chat_widget = window.chat_widget
+        chat_widget.preloader.join()
+
+        config._hist_store.close()
+        start = time.perf_counter()
+        chat_widget.setupConfig()
+        result["setup_config_s"] = time.perf_counter() - start
+
+        # the newest chat is the long one, switch away so opening it is not a no-op
+        long_id = max(config._hist_cache['chats'])
+        chat_widget.display_conversation(1)
+        start = time.perf_counter()
+        chat_widget.display_conversation(long_id)
+        _painted(chat_widget.contentView)
+        result["display_long_chat_s"] = time.perf_counter() - start
+
+        worst = 0.0
+        for query in QUERIES:
+            start = time.perf_counter()
+            chat_widget.filter_conversations(query)
+            elapsed = time.perf_counter() - start
+            worst = max(worst, elapsed)
+            result[f"filter[{query}]_s"] = elapsed
+        chat_widget.filter_conversations("")
+        result["filter_worst_s"] = worst
+
+        start = time.perf_counter()
+        main.AboutQuit()
+        result["about_quit_s"] = time.perf_counter() - start
+
+        config._mainWindow = None
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+        result.update(bench_sidebar(n_messages))
+        return result
+    finally:
+        os.chdir(cwd)
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000, 100_000))
@@ -0,0 +1,62 @@
+"""Build and query cost of the retrieval vector index over a synthetic history.
+
+    python -m benchmarks.bench_vector_index [n_messages]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_workspace
+from storage.hist_store import HistStore
+from storage.vector_index import VectorIndex
+
+QUERIES = ["python fib cache", "how do I stream tokens from the provider", "render history window latency"]
+
+
+def bench(n_messages, folder):
+    workspace = os.path.join(folder, f"vectors_{n_messages}")
+    store = HistStore(make_workspace(workspace, n_messages))
+    result = {"messages": n_messages}
+
+    index = VectorIndex(os.path.join(workspace, "cache", "vectors"))
+    start = time.perf_counter()
+    index.sync(store)
+    result["build_s"] = time.perf_counter() - start
+    result["indexed"] = len(index)
+    index.close()
+
+    start = time.perf_counter()
+    index = VectorIndex(os.path.join(workspace, "cache", "vectors"))
+    result["reopen_s"] = time.perf_counter() - start
+
+    worst = 0.0
+    for query in QUERIES:
+        index.search(query)
+        start = time.perf_counter()
+        index.search(query, k=3, exclude_chat=1)
+        worst = max(worst, time.perf_counter() - start)
+    result["worst_query_s"] = worst
+
+    rounds = 200
+    start = time.perf_counter()
+    for i in range(rounds):
+        index.add(10 ** 9 + i, 1, "one more message about python caches")
+    result["add_one_s"] = (time.perf_counter() - start) / rounds
+    index.close()
+    store.close()
+    return result
+
+
+def main(sizes=(1_000, 10_000, 100_000)):
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for n in sizes:
+            result = bench(n, folder)
+            results.append(result)
+            print(" ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+    return results
+
+
+if __name__ == '__main__':
+    main(tuple(int(n) for n in sys.argv[1:]) or (1_000, 10_000, 100_000))
@@ -0,0 +1,74 @@
+"""Run the benchmark suite and write the results as JSON.
+
+    python -m benchmarks.run [--sizes 1000 10000 100000] [--only ui search] [--output FILE]
+
+Every benchmark runs offscreen on synthetic histories. The JSON file holds
+one list of results per benchmark plus the machine and revision they were
+measured on, so two runs can be diffed or plotted side by side.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks import (bench_hist_store, bench_import, bench_memory, bench_render_cache, bench_search,
+                        bench_startup, bench_transcript, bench_ui, bench_vector_index)
+
+BENCHMARKS = {
+    "import": bench_import,
+    "startup": bench_startup,
+    "ui": bench_ui,
+    "transcript": bench_transcript,
+    "markdown": bench_render_cache,
+    "hist_store": bench_hist_store,
+    "memory": bench_memory,
+    "search": bench_search,
+    "vectors": bench_vector_index,
+}
+
+
+def _revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=bench_startup.ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ChatGUI benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="history sizes in messages")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--output", help="JSON file to write, default benchmarks/results/<time>.json")
+    args = parser.parse_args(argv)
+
+    now = datetime.datetime.now()
+    report = {
+        "created": now.isoformat(timespec="seconds"),
+        "revision": _revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "results": {},
+    }
+    for name in args.only:
+        print(f"# {name}", flush=True)
+        report["results"][name] = BENCHMARKS[name].main(tuple(args.sizes))
+
+    output = args.output or os.path.join(bench_startup.ROOT, "benchmarks", "results",
+                                         now.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+    return report
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+import os
+import random
+
+import joblib
+
+from storage.hist_store import HistStore
+
+WORDS = ("model latency token stream cache python request window thread index "
+         "query render history message provider config answer context").split()
+
+CODE_BLOCK = """```python
+def fib(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+```"""
+
+
+def make_message(rng, i):
+    if i % 2 == 0:
+        sender = 'user'
+        content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40)))
+    else:
+        sender = 'bot'
+        paragraphs = ["## Answer", " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 160)))]
+        if rng.random() < 0.5:
+            paragraphs.append(CODE_BLOCK)
+        paragraphs.append("- " + "\n- ".join(rng.choice(WORDS) for _ in range(4)))
+        content = "\n\n".join(paragraphs)
+    return {'sender': sender, 'content': content, 'time': f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"}
+
+
+def make_history(n_messages, per_chat=50, seed=0, long_chat=0):
+    """Build a ``_hist_cache``-shaped dict holding ``n_messages`` messages.
+
+    ``long_chat`` adds one more chat with that many messages, the newest one.
+    """
+    rng = random.Random(seed)
+    chats = {}
+    for i in range(n_messages):
+        chat_id = i // per_chat + 1
+        chat = chats.setdefault(chat_id, {"title": f"Chat {chat_id}", "messages": []})
+        chat['messages'].append(make_message(rng, i))
+    if long_chat:
+        chats[len(chats) + 1] = {"title": "Long chat",
+                                 "messages": [make_message(rng, i) for i in range(long_chat)]}
+    return {"next_id": len(chats) + 1, "chats": chats}
+
+
+def make_workspace(folder, n_messages, long_chat=0):
+    """Lay out ``folder`` like the app's working directory with a synthetic history.
+
+    Creates ``cfg/`` and ``cache/hist.db`` so ``main.py`` can run with
+    ``folder`` as its current directory. Returns the database path.
+    """
+    os.makedirs(os.path.join(folder, "cfg"), exist_ok=True)
+    os.makedirs(os.path.join(folder, "cache"), exist_ok=True)
+    pkl_path = os.path.join(folder, "hist.pkl")
+    joblib.dump(make_history(n_messages, long_chat=long_chat), pkl_path)
+    db_path = os.path.join(folder, "cache", "hist.db")
+    store = HistStore(db_path)
+    store.migrate_pickle(pkl_path)
+    store.close()
+    os.remove(pkl_path)
+    return db_path
@@ -3,8 +3,11 @@ import os
 import sys
 import platform
 import ctypes
-import pprint
-import joblib
+
+# Headless batch mode, before anything imports Qt
+if __name__ == '__main__' and sys.argv[1:2] == ['--batch']:
+    from batch import main as batch_main
+    sys.exit(batch_main(sys.argv[2:]))
 
 # UI
 import qdarktheme
@@ -16,20 +19,26 @@ from ui.mainWindow import MainWindow
 if not os.path.isfile('cfg/config.py'):
     open("cfg/config.py", "a", encoding="utf-8").close()
 import cfg.config as config
+from agent import client_pool
+from agent import response_cache
+from storage import render_cache
+from storage import config_store
 
 def AboutQuit():
-    joblib.dump(config._hist_cache, config.hist_cache_path)
-    with open("cfg/config.py","w",encoding="utf-8") as configObj:
-        for name in dir(config):
-            if not name.startswith("_"):
-                try:
-                    value = eval(f"config.{name}")
-                    configObj.write(f"{name} = {pprint.pformat(value)}\n")
-                except:
-                    pass
+    if getattr(config, "_mainWindow", None) is not None and config._mainWindow.chat_widget.ready:
+        config._mainWindow.chat_widget.agent_router.cancel_all()
+    client_pool.close_all()
+    if hasattr(config, "_hist_store"):
+        config._hist_store.close()
+    if hasattr(config, "_vector_index"):
+        config._vector_index.close()
+    render_cache.close()
+    response_cache.close()
+    # settings are saved to cfg/config.json as they change, nothing to write here
 
 if __name__ == '__main__':
     appName = "ChatGUI"
+    config_store.configure(config, "cfg/config.json")
 
     # Windows speical handler
     oper_sys = platform.platform()
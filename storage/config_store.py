@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import weakref
+
+# value types of the known settings; names ending in one of the suffixes
+# share its type, anything else only has to be JSON serialisable
+TYPES = {
+    "models": list,
+    "darkTheme": bool,
+    "stream_output": bool,
+    "RESPONSE_CACHE": (bool, type(None)),
+    "HTTP2": bool,
+}
+SUFFIX_TYPES = {
+    "_API_KEY": str,
+    "_TEMPERATURE": float,
+    "_MAX_TOKENS": int,
+    "_CONTEXT_TOKENS": int,
+    "_RPM": (int, type(None)),
+    "_TPM": (int, type(None)),
+    "_MAX_CONCURRENT": int,
+    "_TIMEOUT": float,
+    "_DELAY": float,
+    "_path": str,
+}
+
+# settings once saved under another name, moved over when the config loads
+RENAMED = {
+    "ChatGPT_TEMEPERATURE": "ChatGPT_TEMPERATURE",
+}
+
+
+def migrate_names(values):
+    """Move renamed settings to their current name, True if any was found."""
+    found = False
+    for old, new in RENAMED.items():
+        if old in values:
+            values.setdefault(new, values.pop(old))
+            found = True
+    return found
+
+
+def expected_type(name):
+    if name in TYPES:
+        return TYPES[name]
+    for suffix, kind in SUFFIX_TYPES.items():
+        if name.endswith(suffix):
+            return kind
+    return None
+
+
+def coerce(name, value):
+    """Check ``value`` against the type of setting ``name``, widening int to float."""
+    kind = expected_type(name)
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if kind is not None and not isinstance(value, kind):
+        raise TypeError(f"config {name} expects {kind}, got {type(value).__name__}")
+    json.dumps(value)
+    return value
+
+
+class ConfigStore:
+    """Settings persisted as JSON and mirrored onto the ``cfg.config`` module.
+
+    The module stays the in-memory snapshot everything reads from; every
+    ``update`` writes the whole file to a temporary name and renames it
+    over the old one, so a crash never leaves a half written config.
+    """
+    def __init__(self, module, path):
+        self.module = module
+        self.path = path
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Apply the saved settings, migrating from the module on first run."""
+        if os.path.isfile(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            migrated = migrate_names(saved)
+            for name, value in saved.items():
+                try:
+                    self.values[name] = coerce(name, value)
+                except TypeError:
+                    # a hand edited value of the wrong type keeps the default
+                    continue
+                setattr(self.module, name, self.values[name])
+            if migrated:
+                self._write()
+        else:
+            # cfg/config.py used to be rewritten with every setting on exit
+            legacy = {name: value for name, value in vars(self.module).items() if not name.startswith("_")}
+            migrate_names(legacy)
+            for name, value in legacy.items():
+                try:
+                    self.values[name] = coerce(name, value)
+                except (TypeError, ValueError):
+                    continue
+                setattr(self.module, name, self.values[name])
+            self._write()
+
+    def get(self, name, default=None):
+        return getattr(self.module, name, default)
+
+    def update(self, values):
+        """Set and save settings, returns ``{name: (old, new)}`` for what changed."""
+        changes = {}
+        with self.lock:
+            for name, value in values.items():
+                value = coerce(name, value)
+                old = getattr(self.module, name, None)
+                if name in self.values and old == value:
+                    continue
+                self.values[name] = value
+                setattr(self.module, name, value)
+                changes[name] = (old, value)
+            if changes:
+                self._write()
+        return changes
+
+    def _write(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.values, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+_store = None
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def configure(module, path):
+    """Load ``path`` onto ``module``; call once at startup before agents read settings."""
+    global _store
+    _store = ConfigStore(module, path)
+    _store.load()
+    return _store
+
+
+def update(values):
+    """Set and save settings and tell the subscribers what changed."""
+    changes = _store.update(values)
+    if changes:
+        with _listeners_lock:
+            callbacks = [ref() for ref in _listeners]
+        for callback in callbacks:
+            if callback is not None:
+                callback(changes)
+    return changes
+
+
+def subscribe(callback):
+    """Call ``callback({name: (old, new)})`` after every update that changes something.
+
+    Bound methods are held weakly, so an agent that subscribes does not
+    outlive its last user.
+    """
+    if hasattr(callback, "__self__"):
+        ref = weakref.WeakMethod(callback)
+    else:
+        ref = lambda: callback
+    with _listeners_lock:
+        _listeners[:] = [r for r in _listeners if r() is not None]
+        _listeners.append(ref)
@@ -0,0 +1,149 @@
+import html
+import json
+import os
+from datetime import datetime
+
+FORMATS = {".jsonl": "jsonl", ".md": "markdown", ".html": "html", ".htm": "html"}
+SPEAKERS = {'user': "User", 'bot': "Assistant"}
+
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; max-width: 50em; margin: 2em auto; padding: 0 1em; line-height: 1.5; }}
+h1 {{ border-bottom: 1px solid #ccc; padding-bottom: .3em; margin-top: 2em; }}
+.message {{ margin: 1em 0; }}
+.sender {{ font-weight: bold; }}
+.time {{ color: #888; font-size: smaller; margin-left: .5em; }}
+.user .body {{ white-space: pre-wrap; }}
+pre {{ background: #f4f4f4; padding: .8em; overflow-x: auto; }}
+</style></head><body>
+"""
+
+
+# link schemes a browser would run rather than follow
+UNSAFE_SCHEMES = ("javascript:", "vbscript:", "data:")
+
+
+def format_for(path):
+    return FORMATS.get(os.path.splitext(path)[1].lower(), "jsonl")
+
+
+def iter_chats(store, chat_ids=None):
+    """Yield (chat_id, chat, messages) with ``messages`` a lazy iterator."""
+    chats = store.load_index()['chats']
+    for chat_id in (chat_ids if chat_ids is not None else sorted(chats)):
+        if chat_id in chats:
+            yield chat_id, chats[chat_id], store.iter_messages(chat_id)
+
+
+def _time(message):
+    # messages only show HH:MM:SS, an export can span days
+    return datetime.fromtimestamp(message.timestamp).isoformat(timespec="seconds")
+
+
+def _converter():
+    """Markdown converter for replies that keeps raw HTML as text.
+
+    A reply quoting ``<script>`` or an ``<img onerror=...>`` would
+    otherwise run when the standalone file is opened in a browser.
+    """
+    import markdown
+    from markdown.treeprocessors import Treeprocessor
+
+    class DropUnsafeLinks(Treeprocessor):
+        def run(self, root):
+            for element in root.iter():
+                for name in ('href', 'src'):
+                    value = "".join(ch for ch in element.get(name, "") if ch > " ").lower()
+                    if value.startswith(UNSAFE_SCHEMES):
+                        del element.attrib[name]
+
+    converter = markdown.Markdown()
+    converter.preprocessors.deregister('html_block')
+    converter.inlinePatterns.deregister('html')
+    # after the inline processor has turned links into elements
+    converter.treeprocessors.register(DropUnsafeLinks(converter), 'drop_unsafe_links', 5)
+    return converter
+
+
+def jsonl_lines(chats):
+    for chat_id, chat, messages in chats:
+        for message in messages:
+            yield json.dumps(dict(message, time=_time(message), chat_id=chat_id, chat_title=chat['title']), ensure_ascii=False) + "\n"
+            yield None
+
+
+def markdown_lines(chats):
+    for chat_id, chat, messages in chats:
+        updated = datetime.fromtimestamp(chat['updated']).strftime("%Y-%m-%d %H:%M")
+        yield f"# {chat['title']}\n\n_Chat {chat_id}, last updated {updated}_\n\n"
+        for message in messages:
+            yield f"**{SPEAKERS.get(message['sender'], message['sender'])}** {_time(message)}\n\n"
+            yield message['content'].rstrip() + "\n\n---\n\n"
+            yield None
+
+
+def html_lines(chats, title="ChatGUI export"):
+    # one converter for the whole export, building one per message costs more than converting
+    converter = _converter()
+    yield HTML_HEAD.format(title=html.escape(title))
+    for chat_id, chat, messages in chats:
+        yield f"<h1>{html.escape(chat['title'])}</h1>\n"
+        for message in messages:
+            sender = message['sender']
+            if sender == 'user':
+                body = html.escape(message['content'])
+            else:
+                body = converter.reset().convert(message['content'])
+            yield (f"<div class=\"message {html.escape(sender)}\"><span class=\"sender\">"
+                   f"{SPEAKERS.get(sender, html.escape(sender))}</span><span class=\"time\">"
+                   f"{_time(message)}</span><div class=\"body\">{body}</div></div>\n")
+            yield None
+    yield "</body></html>\n"
+
+
+WRITERS = {"jsonl": jsonl_lines, "markdown": markdown_lines, "html": html_lines}
+
+
+def export(store, path, chat_ids=None, fmt=None, progress=None, cancel=None):
+    """Write the chats to ``path`` and return the number of messages written.
+
+    Chats are streamed out of the store a batch of messages at a time and
+    formatted by generators, so memory use does not grow with the history.
+    The file is written under a temporary name and renamed into place once
+    complete. ``fmt`` (jsonl, markdown or html) defaults to the one matching
+    the file extension. ``progress`` is called with (messages done, messages
+    total) every few hundred messages; a cancelled ``cancel`` token stops the
+    export and leaves any existing file at ``path`` untouched.
+    """
+    chats = store.load_index()['chats']
+    ids = chat_ids if chat_ids is not None else sorted(chats)
+    total = sum(chats[i]['count'] for i in ids if i in chats)
+    lines = WRITERS[fmt or format_for(path)](iter_chats(store, ids))
+
+    # writers yield None after each message, as a tick for progress and cancel
+    done = 0
+    tmp_path = f"{path}.part"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                if line is not None:
+                    f.write(line)
+                    continue
+                done += 1
+                if done % 250 == 0:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    if progress is not None:
+                        progress(done, total)
+        if cancel is not None and cancel.cancelled:
+            os.remove(tmp_path)
+            return done
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if progress is not None:
+        progress(done, total)
+    return done
@@ -0,0 +1,301 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from storage.message import Message
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    updated REAL NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL REFERENCES chats(id),
+    sender TEXT NOT NULL,
+    content TEXT NOT NULL,
+    time TEXT NOT NULL,
+    meta TEXT,
+    ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS messages_chat ON messages(chat_id, id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+
+def _snippet(content, words, width=12):
+    tokens = content.split()
+    lowered = [t.lower() for t in tokens]
+    prefixes = [w.lower() for w in words]
+    for i, token in enumerate(lowered):
+        if any(p in token for p in prefixes):
+            start = max(0, i - width // 3)
+            text = " ".join(tokens[start:start + width])
+            return ("..." if start else "") + text + ("..." if start + width < len(tokens) else "")
+    return " ".join(tokens[:width])
+
+
+# legacy rows only have an HH:MM:SS time, take the day from the chat's last update
+BACKFILL_TS = """
+UPDATE messages SET ts = COALESCE(
+    CAST(strftime('%s', date((SELECT updated FROM chats WHERE chats.id = messages.chat_id), 'unixepoch',
+                             'localtime') || ' ' || time, 'utc') AS INTEGER),
+    CAST((SELECT updated FROM chats WHERE chats.id = messages.chat_id) AS INTEGER),
+    0)
+WHERE ts IS NULL
+"""
+
+
+class HistStore:
+    """Conversation history in SQLite, one durable row per message.
+
+    The database runs in WAL mode so every append is a single small commit
+    and a crash loses at most the message being written, never the session.
+    Only a lightweight chat index is read at startup; message bodies are
+    loaded per chat on first access and at most ``resident`` chats are kept
+    in memory, least recently used first out.
+    """
+    def __init__(self, path, resident=20):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'").fetchone() is not None
+        self.conn.executescript(SCHEMA)
+        self._upgrade_schema()
+        if not has_fts:
+            # index messages written before full-text search existed
+            self.conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+        self.resident = resident
+        self._messages = OrderedDict()
+
+    def _upgrade_schema(self):
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(messages)")]
+        if 'meta' not in columns:
+            self.conn.execute("ALTER TABLE messages ADD COLUMN meta TEXT")
+        if 'ts' not in columns:
+            self.conn.execute("ALTER TABLE messages ADD COLUMN ts INTEGER")
+            self.conn.execute(BACKFILL_TS)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(chats)")]
+        if 'count' not in columns:
+            self.conn.execute("ALTER TABLE chats ADD COLUMN count INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute("UPDATE chats SET count = "
+                              "(SELECT COUNT(*) FROM messages WHERE messages.chat_id = chats.id)")
+
+    def next_id(self):
+        row = self.conn.execute("SELECT MAX(id) FROM chats").fetchone()
+        return (row[0] or 0) + 1
+
+    def create_chat(self, chat_id, title):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO chats (id, title, updated) VALUES (?, ?, ?)",
+                              (chat_id, title, time.time()))
+            self._messages[chat_id] = []
+            self._evict()
+
+    def set_title(self, chat_id, title):
+        with self.lock:
+            self.conn.execute("UPDATE chats SET title = ? WHERE id = ?", (title, chat_id))
+
+    def append_message(self, chat_id, sender, content, time_str, meta=None):
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN")
+            # time is still written for older versions reading the same database
+            cursor = self.conn.execute(
+                "INSERT INTO messages (chat_id, sender, content, time, meta, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (chat_id, sender, content, time_str, json.dumps(meta) if meta else None, int(now)))
+            self.conn.execute("UPDATE chats SET updated = ?, count = count + 1 WHERE id = ?",
+                              (now, chat_id))
+            self.conn.execute("COMMIT")
+            if chat_id in self._messages:
+                self._messages[chat_id].append(Message(sender, content, int(now), meta))
+            return cursor.lastrowid
+
+    def load_index(self):
+        """Return ``{"next_id", "chats"}`` where each chat only carries its
+        title, last-updated time and message count."""
+        chats = {}
+        for chat_id, title, updated, count in self.conn.execute(
+                "SELECT id, title, updated, count FROM chats ORDER BY id"):
+            chats[chat_id] = {"title": title, "updated": updated, "count": count}
+        return {"next_id": self.next_id(), "chats": chats}
+
+    def messages(self, chat_id):
+        """Return the message list of a chat, loading it if not resident."""
+        with self.lock:
+            if chat_id in self._messages:
+                self._messages.move_to_end(chat_id)
+                return self._messages[chat_id]
+            rows = self.conn.execute(
+                "SELECT sender, content, ts, meta FROM messages WHERE chat_id = ? ORDER BY id", (chat_id,))
+            messages = [Message(*row) for row in rows]
+            self._messages[chat_id] = messages
+            self._evict()
+            return messages
+
+    def search(self, text, limit=50, candidates=1000):
+        """Full-text search over all messages, best matches first.
+
+        Every word of ``text`` must appear in the message, the last one as
+        a prefix so results update while it is being typed.
+        BM25 ranking is applied to the ``candidates`` most recent matches
+        only, which keeps common words fast on very large histories.
+        Returns ``(chat_id, message_id, title, snippet)`` tuples.
+        """
+        words = [w.replace('"', '""') for w in text.split()]
+        if not words:
+            return []
+        # only the word being typed is matched as a prefix, prefix
+        # expansion of every word is several times slower
+        query = " ".join(f'"{w}"' for w in words[:-1]) + f' "{words[-1]}"*'
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? "
+                "ORDER BY rowid DESC LIMIT 1 OFFSET ?", (query, candidates - 1)).fetchone()
+            oldest = row[0] if row else 0
+            ids = [r[0] for r in self.conn.execute(
+                "SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? AND rowid >= ? "
+                "ORDER BY rank LIMIT ?", (query, oldest, limit))]
+            if not ids:
+                return []
+            rows = self.conn.execute(
+                "SELECT m.id, m.chat_id, c.title, m.content FROM messages m "
+                f"JOIN chats c ON c.id = m.chat_id WHERE m.id IN ({','.join('?' * len(ids))})", ids)
+            found = {message_id: (chat_id, title, content) for message_id, chat_id, title, content in rows}
+        results = []
+        for message_id in ids:
+            chat_id, title, content = found[message_id]
+            results.append((chat_id, message_id, title, _snippet(content, words)))
+        return results
+
+    def metrics(self, limit=10000):
+        """Request metrics stored with the most recent assistant messages."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT meta FROM messages WHERE meta IS NOT NULL AND sender = 'bot' "
+                "ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        records = []
+        for (meta,) in rows:
+            metrics = json.loads(meta).get('metrics')
+            if metrics:
+                # stored before the field was named for what it measures
+                if 'connect' in metrics:
+                    metrics.setdefault('headers', metrics.pop('connect'))
+                records.append(metrics)
+        records.reverse()
+        return records
+
+    def message_position(self, chat_id, message_id):
+        """Index of a message inside its chat's message list."""
+        with self.lock:
+            row = self.conn.execute("SELECT COUNT(*) FROM messages WHERE chat_id = ? AND id < ?",
+                                    (chat_id, message_id)).fetchone()
+        return row[0]
+
+    def iter_messages(self, chat_id, batch=1000):
+        """Yield a chat's messages oldest first, reading ``batch`` rows at a time.
+
+        Unlike ``messages`` nothing is kept resident, so walking every chat
+        of a large history needs memory for one batch only.
+        """
+        cursor = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT id, sender, content, ts, meta FROM messages WHERE chat_id = ? AND id > ? "
+                    "ORDER BY id LIMIT ?", (chat_id, cursor, batch)).fetchall()
+            for row in rows:
+                yield Message(*row[1:])
+            if len(rows) < batch:
+                return
+            cursor = rows[-1][0]
+
+    def messages_after(self, message_id, limit=2000):
+        """(id, chat_id, content) of up to ``limit`` messages newer than ``message_id``."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, chat_id, content FROM messages WHERE id > ? ORDER BY id LIMIT ?",
+                (message_id, limit)).fetchall()
+
+    def messages_by_id(self, message_ids):
+        """{id: (chat_id, title, sender, content)} for the given message ids."""
+        if not message_ids:
+            return {}
+        marks = ",".join("?" * len(message_ids))
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT m.id, m.chat_id, c.title, m.sender, m.content FROM messages m "
+                f"JOIN chats c ON c.id = m.chat_id WHERE m.id IN ({marks})", list(message_ids)).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def _evict(self):
+        while len(self._messages) > self.resident:
+            self._messages.popitem(last=False)
+
+    def load_all(self):
+        """Return the whole history in the in-memory ``_hist_cache`` layout."""
+        chats = {}
+        for chat_id, title in self.conn.execute("SELECT id, title FROM chats ORDER BY id"):
+            chats[chat_id] = {"title": title, "messages": []}
+        rows = self.conn.execute("SELECT chat_id, sender, content, ts, meta FROM messages ORDER BY id")
+        for row in rows:
+            if row[0] in chats:
+                chats[row[0]]["messages"].append(Message(*row[1:]))
+        return {"next_id": self.next_id(), "chats": chats}
+
+    def migrate_pickle(self, pkl_path):
+        """Import a legacy joblib ``hist.pkl`` once; later calls are no-ops.
+
+        Messages may be legacy dicts or ``Message`` objects; dict times get
+        their day from the chat's position, as the pickle stores none.
+        """
+        done = self.conn.execute("SELECT value FROM meta WHERE key = 'migrated_pickle'").fetchone()
+        if done or not os.path.isfile(pkl_path):
+            return False
+
+        import joblib
+        hist_cache = joblib.load(pkl_path)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN")
+            chats = sorted(hist_cache.get('chats', {}).items())
+            for i, (chat_id, chat) in enumerate(chats):
+                # keep the old newest-id-first order when sorting by recency
+                self.conn.execute("INSERT OR REPLACE INTO chats (id, title, updated) VALUES (?, ?, ?)",
+                                  (chat_id, chat['title'], now - len(chats) + i))
+                self.conn.execute("UPDATE chats SET count = ? WHERE id = ?", (len(chat['messages']), chat_id))
+                self.conn.executemany(
+                    "INSERT INTO messages (chat_id, sender, content, time, meta, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(chat_id, m['sender'], m['content'], m['time'],
+                      json.dumps(m['meta']) if m.get('meta') else None, getattr(m, 'timestamp', None))
+                     for m in chat['messages']])
+            self.conn.execute(BACKFILL_TS)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_pickle', ?)",
+                              (pkl_path,))
+            self.conn.execute("COMMIT")
+        return True
+
+    def close(self):
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
@@ -0,0 +1,83 @@
+import json
+import time
+
+# interned sender codes, new senders are added on first use
+SENDERS = ['user', 'bot']
+_codes = {sender: code for code, sender in enumerate(SENDERS)}
+
+
+def sender_code(sender):
+    code = _codes.get(sender)
+    if code is None:
+        code = _codes[sender] = len(SENDERS)
+        SENDERS.append(sender)
+    return code
+
+
+class Message:
+    """One chat message, stored compactly.
+
+    The sender is a small code into ``SENDERS``, the time an epoch second
+    and metadata is kept as the JSON text read from the database until it
+    is first asked for. Messages still read like the legacy dicts
+    (``message['sender']``, ``message.get('meta')``, ``dict(message)``),
+    so ``HistStore.migrate_pickle`` accepts pickles of either form.
+    """
+    __slots__ = ('code', 'content', 'timestamp', '_meta')
+
+    def __init__(self, sender, content, timestamp, meta=None):
+        self.code = sender_code(sender)
+        self.content = content
+        self.timestamp = timestamp
+        self._meta = meta or None
+
+    @property
+    def sender(self):
+        return SENDERS[self.code]
+
+    @property
+    def time(self):
+        return time.strftime("%H:%M:%S", time.localtime(self.timestamp))
+
+    @property
+    def meta(self):
+        if isinstance(self._meta, str):
+            self._meta = json.loads(self._meta)
+        return self._meta
+
+    @property
+    def model(self):
+        return ((self.meta or {}).get('metrics') or {}).get('model')
+
+    @property
+    def tokens(self):
+        """(prompt, completion) token counts reported for a reply, None if unknown."""
+        metrics = (self.meta or {}).get('metrics') or {}
+        return metrics.get('prompt_tokens'), metrics.get('completion_tokens')
+
+    def keys(self):
+        return ('sender', 'content', 'time', 'meta') if self._meta else ('sender', 'content', 'time')
+
+    def __getitem__(self, key):
+        if key not in ('sender', 'content', 'time', 'meta'):
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Message({self.sender!r}, {self.content[:40]!r}, {self.timestamp})"
+
+    def __reduce__(self):
+        # pickle the sender by name, codes depend on the order senders were first seen
+        return Message, (self.sender, self.content, self.timestamp, self._meta)
+
+    def to_dict(self):
+        return dict(self)
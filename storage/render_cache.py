@@ -0,0 +1,148 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def renderer_version():
+    # markdown is imported on the first render, not at startup;
+    # bump the suffix when the markdown options or the HTML around it change
+    import markdown
+    return f"markdown-{markdown.__version__}-1"
+
+
+class RenderCache:
+    """Markdown -> HTML cache keyed by content hash and renderer version.
+
+    A size-bounded in-memory LRU sits in front of an optional SQLite tier
+    so rendered answers survive chat switches and restarts. The disk tier
+    holds at most ``disk_max_bytes`` of HTML, least recently used out.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024, disk_path=None, disk_max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.size = 0
+        self.disk_size = 0
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = None
+        if disk_path:
+            folder = os.path.dirname(disk_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.conn = sqlite3.connect(disk_path, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=OFF")
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(html)")]
+            if columns and 'used' not in columns:
+                # written before the disk tier was bounded, it is only a cache
+                self.conn.execute("DROP TABLE html")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS html ("
+                              "key TEXT PRIMARY KEY, html TEXT NOT NULL, "
+                              "used REAL NOT NULL, size INTEGER NOT NULL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS html_used ON html(used)")
+            self.disk_size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM html").fetchone()[0]
+
+    @staticmethod
+    def key(content):
+        return hashlib.sha1(f"{renderer_version()}\0{content}".encode("utf-8")).hexdigest()
+
+    def render(self, content):
+        key = self.key(content)
+        with self.lock:
+            html = self.memory.get(key)
+            if html is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return html
+
+            row = None
+            if self.conn is not None:
+                row = self.conn.execute("SELECT html, used FROM html WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                html = row[0]
+                self.disk_hits += 1
+                now = time.time()
+                # an hour is precise enough for eviction and spares a write per row of a chat reopened
+                if now - row[1] > 3600:
+                    self.conn.execute("UPDATE html SET used = ? WHERE key = ?", (now, key))
+            else:
+                import markdown
+                html = markdown.markdown(content)
+                self.misses += 1
+                if self.conn is not None:
+                    self.conn.execute("INSERT OR REPLACE INTO html (key, html, used, size) VALUES (?, ?, ?, ?)",
+                                      (key, html, time.time(), len(html)))
+                    self.disk_size += len(html)
+                    if self.disk_size > self.disk_max_bytes:
+                        self._trim_disk()
+            self._remember(key, html)
+            return html
+
+    def _remember(self, key, html):
+        self.memory[key] = html
+        self.size += len(html)
+        while self.size > self.max_bytes and self.memory:
+            _, old = self.memory.popitem(last=False)
+            self.size -= len(old)
+
+    def _trim_disk(self):
+        # down to nine tenths of the cap, so the next few misses do not trim again
+        target = self.disk_max_bytes * 9 // 10
+        keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM html ORDER BY used"):
+            keys.append((key,))
+            self.disk_size -= size
+            if self.disk_size <= target:
+                break
+        self.conn.executemany("DELETE FROM html WHERE key = ?", keys)
+
+    def clear_memory(self):
+        with self.lock:
+            self.memory.clear()
+            self.size = 0
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'entries': len(self.memory),
+            'bytes': self.size,
+            'disk_bytes': self.disk_size,
+        }
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_cache = RenderCache()
+
+
+def configure(max_bytes=32 * 1024 * 1024, disk_path=None, disk_max_bytes=128 * 1024 * 1024):
+    global _cache
+    _cache.close()
+    _cache = RenderCache(max_bytes, disk_path, disk_max_bytes)
+
+
+def render(content):
+    return _cache.render(content)
+
+
+def stats():
+    return _cache.stats()
+
+
+def close():
+    _cache.close()
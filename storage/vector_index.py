@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+DIM = 256
+WORD = re.compile(r"\w{3,}")
+STOP_WORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has have this that with "
+    "from they will would there their what about which when your into more some could them "
+    "than then its also just like how".split())
+
+
+def embed(text, max_words=2000):
+    """Hashed word and word-pair counts, log scaled and L2 normalised.
+
+    No vocabulary and no model: every feature is hashed into one of ``DIM``
+    columns with a random sign, so vectors of any two texts are comparable.
+    """
+    words = [w for w in WORD.findall(text.lower()[:max_words * 8]) if w not in STOP_WORDS][:max_words]
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(DIM, dtype=np.float32)
+    if not features:
+        return vector
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    vector += np.bincount(hashes % DIM, weights=signs, minlength=DIM).astype(np.float32)
+    vector = np.sign(vector) * np.log1p(np.abs(vector))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """Cosine search over message vectors kept in memory-mapped files.
+
+    ``<path>.f32`` holds one ``DIM`` float32 row per message and
+    ``<path>.ids`` the (message id, chat id) of each row; both grow by
+    doubling and are paged in by the OS, so opening the index reads nothing.
+    """
+    def __init__(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.vectors_path = f"{path}.f32"
+        self.ids_path = f"{path}.ids"
+        self.lock = threading.Lock()
+        self.syncing = False
+        if os.path.isfile(self.vectors_path) and os.path.isfile(self.ids_path):
+            capacity = min(os.path.getsize(self.vectors_path) // (DIM * 4),
+                           os.path.getsize(self.ids_path) // 16)
+            self._map(capacity)
+            # rows are filled in order, the first empty id marks the end
+            empty = np.flatnonzero(self.ids[:, 0] == 0)
+            self.count = int(empty[0]) if len(empty) else capacity
+        else:
+            self._resize(1024)
+            self.count = 0
+
+    def _map(self, capacity):
+        self.capacity = capacity
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, DIM))
+        self.ids = np.memmap(self.ids_path, dtype=np.int64, mode="r+", shape=(capacity, 2))
+
+    def _resize(self, capacity):
+        if getattr(self, "vectors", None) is not None:
+            self.vectors.flush()
+            self.ids.flush()
+            self.vectors = self.ids = None
+        for file_path, row_bytes in ((self.vectors_path, DIM * 4), (self.ids_path, 16)):
+            with open(file_path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._map(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, message_id, chat_id, text):
+        """Index one new message; skipped while ``sync`` is catching up, which will reach it."""
+        vector = embed(text)
+        with self.lock:
+            if self.syncing:
+                return
+            self._append(np.array([[message_id, chat_id]], dtype=np.int64), vector[None, :])
+
+    def _append(self, ids, vectors):
+        needed = self.count + len(ids)
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self._resize(capacity)
+        self.vectors[self.count:needed] = vectors
+        self.ids[self.count:needed] = ids
+        self.count = needed
+
+    def sync(self, store, batch=2000):
+        """Index every message of ``store`` newer than the newest one indexed."""
+        with self.lock:
+            self.syncing = True
+            cursor = int(self.ids[:self.count, 0].max()) if self.count else 0
+        try:
+            while True:
+                rows = store.messages_after(cursor, batch)
+                if not rows:
+                    with self.lock:
+                        # messages stored while the last batch was indexed
+                        rows = store.messages_after(cursor, batch)
+                        if not rows:
+                            self.syncing = False
+                            break
+                vectors = np.stack([embed(content) for _, _, content in rows])
+                ids = np.array([(message_id, chat_id) for message_id, chat_id, _ in rows], dtype=np.int64)
+                with self.lock:
+                    self._append(ids, vectors)
+                cursor = rows[-1][0]
+        finally:
+            with self.lock:
+                self.syncing = False
+                self.flush()
+
+    def search(self, text, k=3, exclude_chat=None, min_score=0.0, max_score=1.0):
+        """[(message_id, chat_id, score)] of the ``k`` most similar messages.
+
+        Messages scoring above ``max_score`` are skipped, they repeat
+        ``text`` rather than add to it.
+        """
+        query = embed(text)
+        if not query.any():
+            return []
+        with self.lock:
+            count = self.count
+            scores = self.vectors[:count] @ query
+            chats = np.array(self.ids[:count, 1])
+            message_ids = np.array(self.ids[:count, 0])
+        if exclude_chat is not None:
+            scores[chats == exclude_chat] = -1.0
+        if max_score < 1.0:
+            scores[scores > max_score] = -1.0
+        k = min(k, count)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(message_ids[i]), int(chats[i]), float(scores[i])) for i in top if scores[i] >= min_score]
+
+    def flush(self):
+        self.vectors.flush()
+        self.ids.flush()
+
+    def close(self):
+        with self.lock:
+            self.flush()
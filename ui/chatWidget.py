@@ -1,7 +1,7 @@
 import os
+import importlib
+import threading
 from datetime import datetime
-import joblib
-import markdown
 
 # config
 import cfg.config as config
@@ -9,15 +9,37 @@ import cfg.config as config
 # ui
 from PySide6.QtWidgets import (QApplication, QWidget, QHBoxLayout, QVBoxLayout, 
                               QSplitter, QLineEdit, QListView, QPushButton, 
-                              QComboBox, QPlainTextEdit, QProgressBar, QTabWidget, QTextEdit, QListWidget,QListWidgetItem, QFrame)
-from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer
-from PySide6.QtGui import QIcon, QPalette, QColor, QTextCharFormat, QFont, QTextCursor
+                              QComboBox, QPlainTextEdit, QProgressBar, QTabWidget, QTextEdit, QListWidget,QListWidgetItem, QFrame, QMenu,
+                              QMessageBox, QFileDialog, QLabel, QProgressDialog)
+from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer, QThreadPool
+from PySide6.QtGui import QIcon, QPalette, QColor, QFont
 
 from ui.helpWindow import HelpWindow
 from ui.settingWindow import SettingWindow
+from ui.requestWorker import RequestWorker, IngestWorker, ExportWorker
+from ui.compareWindow import CompareWindow
+from ui.conversationList import ConversationList
+from ui.transcriptView import TranscriptView
+from ui.metricsWindow import MetricsWindow
 
 # chat
 from agent.agent_router import AgentRouter
+from agent.cancellation import CancelToken
+from agent import response_cache
+from agent import telemetry
+from agent import token_counter
+
+# history
+from storage.hist_store import HistStore
+from storage import render_cache
+from storage import exporter
+
+
+def preload_modules():
+    """Import what the first request and the first render need, off the GUI thread."""
+    for name in ("openai", "httpx", "markdown"):
+        importlib.import_module(name)
+
 
 class ChatWidget(QWidget):
     def __init__(self, parent):
@@ -28,11 +50,24 @@ class ChatWidget(QWidget):
 
         self.setupUI()
         self.setupConnections()
-        self.setupAgent()
         self.apply_minimal_theme()
 
+        # the agent and the history are loaded by finish_setup once the window has painted
+        self.ready = False
+        for widget in (self.userInput, self.newButton, self.toolsButton, self.searchContent):
+            widget.setEnabled(False)
+
+    def finish_setup(self):
+        if self.ready:
+            return
+        self.setupAgent()
         self.setupConfig()
-        
+        for widget in (self.userInput, self.newButton, self.toolsButton, self.searchContent):
+            widget.setEnabled(True)
+        self.ready = True
+        self.preloader = threading.Thread(target=preload_modules, daemon=True)
+        self.preloader.start()
+
     def setupUI(self):
         # Main layout
         main_layout = QHBoxLayout()
@@ -52,9 +87,20 @@ class ChatWidget(QWidget):
         self.searchContent = QLineEdit()
         self.searchContent.setPlaceholderText("Search ...")
         self.searchContent.setClearButtonEnabled(True)
+
+        # Search hits inside messages, shown while a query is typed
+        self.searchResults = QListWidget()
+        self.searchResults.setFrameShape(QFrame.NoFrame)
+        self.searchResults.setWordWrap(True)
+        self.searchResults.hide()
+
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(200)
         
         # Conversation list
-        self.conversationList = QListWidget()
+        self.conversationList = ConversationList()
+        self.conversationList.setObjectName("conversationList")
         self.conversationList.setFrameShape(QFrame.NoFrame)
         
         # Settings button - minimal
@@ -75,6 +121,7 @@ class ChatWidget(QWidget):
         button_layout.addWidget(self.helpButton)
         
         sidebar_layout.addWidget(self.searchContent)
+        sidebar_layout.addWidget(self.searchResults, 1)
         sidebar_layout.addWidget(self.conversationList, 1)
         sidebar_layout.addWidget(button_container,0,Qt.AlignBottom)
         
@@ -102,24 +149,30 @@ class ChatWidget(QWidget):
         
         self.newButton = QPushButton("New Chat")
         self.newButton.setFlat(True)
+
+        self.toolsButton = QPushButton("Tools")
+        self.toolsButton.setFlat(True)
+        self.toolsMenu = QMenu(self.toolsButton)
+        self.compareAction = self.toolsMenu.addAction("Compare Models")
+        self.openFileAction = self.toolsMenu.addAction("Open Text File ...")
+        self.countTokensAction = self.toolsMenu.addAction("Count Prompt Tokens")
+        self.toolsMenu.addSeparator()
+        self.saveChatAction = self.toolsMenu.addAction("Save Chat ...")
+        self.exportAction = self.toolsMenu.addAction("Export All Chats ...")
+        self.printAction = self.toolsMenu.addAction("Print Chat ...")
+        self.cacheStatsAction = self.toolsMenu.addAction("Response Cache Stats")
+        self.metricsAction = self.toolsMenu.addAction("Request Metrics")
+        self.toolsButton.setMenu(self.toolsMenu)
         
         top_bar_layout.addWidget(self.apiModels)
         top_bar_layout.addStretch()
+        top_bar_layout.addWidget(self.toolsButton)
         top_bar_layout.addWidget(self.newButton)
         
-        # Content display
-        self.contentView = QTextEdit()
+        # Content display, only the visible messages are laid out and painted
+        self.contentView = TranscriptView()
+        self.contentView.setObjectName("transcript")
         self.contentView.setFrameShape(QFrame.NoFrame)
-        self.contentView.setReadOnly(True)
-        self.contentView.setPlaceholderText("")
-        self.contentView.setStyleSheet("""
-            QTextEdit {
-                background: transparent;
-                border: none;
-                padding: 10;
-                margin: 0;
-            }
-        """)
       
         # Input area
         self.inputContainer = QWidget()
@@ -131,7 +184,33 @@ class ChatWidget(QWidget):
         self.userInput.setPlaceholderText('Type your message...')
         self.userInput.setClearButtonEnabled(True)
         self.userInput.setMinimumHeight(40) 
-        input_layout.addWidget(self.userInput)
+
+        self.stopButton = QPushButton("Stop")
+        self.stopButton.setMinimumHeight(40)
+        self.stopButton.hide()
+
+        input_row = QHBoxLayout()
+        input_row.addWidget(self.userInput, 1)
+        input_row.addWidget(self.stopButton)
+        input_layout.addLayout(input_row)
+
+        # Token count of the input and of the open chat, refreshed after typing pauses
+        self.tokenLabel = QLabel("")
+        self.tokenLabel.setObjectName("tokenLabel")
+        self.tokenLabel.setStyleSheet("color: gray; font-size: 11px;")
+        input_layout.addWidget(self.tokenLabel)
+        self.tokenTimer = QTimer(self)
+        self.tokenTimer.setSingleShot(True)
+        self.tokenTimer.setInterval(150)
+        self.chat_tokens = 0
+
+        # Busy indicator while requests are in flight
+        self.progressBar = QProgressBar()
+        self.progressBar.setRange(0, 0)
+        self.progressBar.setTextVisible(False)
+        self.progressBar.setFixedHeight(4)
+        self.progressBar.hide()
+        input_layout.addWidget(self.progressBar)
         
         content_layout.addWidget(top_bar)
         content_layout.addWidget(self.contentView)
@@ -152,14 +231,45 @@ class ChatWidget(QWidget):
         # Other windows
         self.help_window = None
         self.setting_window = None
+        self.compare_window = None
+        self.metrics_window = None
+
+        # Background requests, sized for several models streaming at once
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(getattr(config, "MAX_CONCURRENT_REQUESTS", 16))
+        self.pending_requests = 0
+        # Running exports: progress dialog per target path
+        self.exports = {}
+
+        # Streaming replies: text received so far per chat and deltas not
+        # yet painted into the live row of contentView
+        self.live_replies = {}
+        self.pending_deltas = []
+        self.renderTimer = QTimer(self)
+        self.renderTimer.setInterval(33)
+        self.renderTimer.timeout.connect(self.flush_deltas)
 
     def setupConnections(self):
-        self.conversationList.itemClicked.connect(self.on_chat_clicked)
+        self.conversationList.clicked.connect(self.on_chat_clicked)
         self.newButton.clicked.connect(self.start_new_chat)
-        self.searchContent.textChanged.connect(self.filter_conversations)
+        self.searchContent.textChanged.connect(self.searchTimer.start)
+        self.searchTimer.timeout.connect(lambda: self.filter_conversations(self.searchContent.text()))
+        self.searchResults.itemClicked.connect(self.on_search_result_clicked)
         self.userInput.returnPressed.connect(self.send_message)
+        self.userInput.textEdited.connect(self.on_input_edited)
+        self.stopButton.clicked.connect(self.stop_generation)
         self.helpButton.clicked.connect(self.show_help)
         self.settingButton.clicked.connect(self.show_setting)
+        self.compareAction.triggered.connect(self.show_compare)
+        self.openFileAction.triggered.connect(self.openTextFileDialog)
+        self.countTokensAction.triggered.connect(self.num_tokens_from_messages)
+        self.saveChatAction.triggered.connect(self.saveData)
+        self.exportAction.triggered.connect(self.exportData)
+        self.printAction.triggered.connect(self.printData)
+        self.userInput.textChanged.connect(self.tokenTimer.start)
+        self.tokenTimer.timeout.connect(self.update_token_count)
+        self.cacheStatsAction.triggered.connect(self.show_cache_stats)
+        self.metricsAction.triggered.connect(self.show_metrics)
         self.apiModels.currentIndexChanged.connect(self.on_model_changed)
         self.userInput.installEventFilter(self)
 
@@ -167,65 +277,97 @@ class ChatWidget(QWidget):
         self.agent_router = AgentRouter(self, self.current_model)
     
     def setupConfig(self):
-        
+        if not hasattr(config, "hist_db_path"):
+            config.hist_db_path = "cache/hist.db"
+        config._hist_store = HistStore(config.hist_db_path, getattr(config, "RESIDENT_CHATS", 20))
+        # one-time import of the pickle written by older versions
         if hasattr(config, "hist_cache_path"):
-            config._hist_cache = joblib.load(config.hist_cache_path)
-            self.load_cached_conversations()
-            if len(config._hist_cache['chats']) == 0:
-                self.is_first_input = True
-            else:
-                self.is_first_input = False
-        else:
-            config.hist_cache_path = "cache/hist.pkl"
-            config._hist_cache = {
-                "next_id": 1,
-                "chats": {}
-            }
-            self.is_first_input = True
-            self.current_chat_id = None
+            config._hist_store.migrate_pickle(config.hist_cache_path)
 
-    def on_chat_clicked(self, item): 
-        chat_id = item.data(Qt.UserRole)
+        render_cache.configure(getattr(config, "RENDER_CACHE_BYTES", 32 * 1024 * 1024),
+                               getattr(config, "render_cache_path", "cache/render.db"),
+                               getattr(config, "RENDER_CACHE_DISK_BYTES", 128 * 1024 * 1024))
+        response_cache.configure(getattr(config, "RESPONSE_CACHE_ENTRIES", 256),
+                                 getattr(config, "response_cache_path", "cache/responses.db"),
+                                 getattr(config, "RESPONSE_CACHE_TTL", 7 * 24 * 3600),
+                                 getattr(config, "RESPONSE_CACHE_BYTES", 64 * 1024 * 1024))
+        config._hist_cache = config._hist_store.load_index()
+        # numpy is only needed from here on
+        from storage.vector_index import VectorIndex
+        config._vector_index = VectorIndex(getattr(config, "vector_index_path", "cache/vectors"))
+        if getattr(config, "RETRIEVAL", True):
+            # index messages stored before retrieval existed, or by another copy of the app
+            threading.Thread(target=config._vector_index.sync, args=(config._hist_store,), daemon=True).start()
+        self.current_chat_id = None
+        self.load_cached_conversations()
+        self.is_first_input = len(config._hist_cache['chats']) == 0
+
+    def on_chat_clicked(self, index):
+        chat_id = index.data(Qt.UserRole)
         if chat_id in config._hist_cache['chats'] and self.current_chat_id!= chat_id:
             self.current_chat_id = chat_id
             self.display_conversation(chat_id)
     
-    def display_conversation(self, id):
-        chat_dict = config._hist_cache['chats'][id]
-        self.contentView.clear()
-        
-        for message in chat_dict['messages']:
-            if message['sender'] == 'user':
-                self.add_user_message(message['content'], message['time'], display_only=True)
-            else:
-                self.add_bot_message(message['content'],message['time'], display_only=True)
-            
-        self.scroll_to_bottom()
+    def display_conversation(self, id, scroll=True):
+        self.contentView.transcript.set_messages(config._hist_store.messages(id))
+        self.recount_chat_tokens()
+
+        self.pending_deltas = []
+        self.update_stop_button()
+        if id in self.live_replies:
+            self.begin_live_block(self.live_replies[id])
+
+        if scroll:
+            self.scroll_to_bottom()
 
     def start_new_chat(self):
-        self.contentView.clear()
+        self.contentView.transcript.clear()
+        self.chat_tokens = 0
+        self.update_token_count()
+        self.pending_deltas = []
+        self.stopButton.hide()
         self.current_chat_id = config._hist_cache['next_id']
         config._hist_cache['next_id'] +=1
 
         new_chat = {
             "title": "New Chat",
-            "messages": [],
+            "updated": datetime.now().timestamp(),
+            "count": 0,
         }
         config._hist_cache['chats'][self.current_chat_id] = new_chat
+        config._hist_store.create_chat(self.current_chat_id, new_chat['title'])
         
-        item = QListWidgetItem(new_chat['title'])
-        item.setData(Qt.UserRole, self.current_chat_id)
-        self.conversationList.insertItem(0, item)
-        
-        self.conversationList.setCurrentItem(item)
-        self.conversationList.scrollToItem(item)
+        self.conversationList.add_chat(self.current_chat_id)
+        self.conversationList.select_chat(self.current_chat_id)
 
         self.is_first_input = False
     
     def filter_conversations(self, text):
-        for i in range(self.conversationList.count()):
-            item = self.conversationList.item(i)
-            item.setHidden(text.lower() not in item.text().lower())
+        self.conversationList.set_filter(text)
+
+        self.searchResults.clear()
+        hits = config._hist_store.search(text) if text.strip() else []
+        for chat_id, message_id, title, snippet in hits:
+            item = QListWidgetItem(f"{title}\n{' '.join(snippet.split())}")
+            item.setData(Qt.UserRole, (chat_id, message_id))
+            self.searchResults.addItem(item)
+        self.searchResults.setVisible(bool(hits))
+
+    def on_search_result_clicked(self, item):
+        chat_id, message_id = item.data(Qt.UserRole)
+        if chat_id not in config._hist_cache['chats']:
+            return
+        self.conversationList.select_chat(chat_id)
+        if self.current_chat_id != chat_id:
+            self.current_chat_id = chat_id
+            self.display_conversation(chat_id, scroll=False)
+
+        row = config._hist_store.message_position(chat_id, message_id)
+        index = self.contentView.transcript.index(row)
+        self.contentView.setCurrentIndex(index)
+        self.contentView.scrollTo(index, QListView.PositionAtTop)
+        # scroll again once the rows around the hit have been measured
+        QTimer.singleShot(50, lambda: self.contentView.scrollTo(index, QListView.PositionAtTop))
     
     def send_message(self):
         message = self.userInput.text()
@@ -234,6 +376,9 @@ class ChatWidget(QWidget):
                 self.userInput.clear()
                 return
 
+            if self.current_chat_id in self.live_replies:
+                return
+
             if self.is_first_input or self.current_chat_id is None:
                 self.start_new_chat()
 
@@ -241,10 +386,242 @@ class ChatWidget(QWidget):
             self.add_user_message(message, user_time)
             self.userInput.clear()
 
-            bot_msg = self.agent_router.route_return(message)
-            bot_time = datetime.now().strftime("%H:%M:%S")
-            self.add_bot_message(bot_msg, bot_time)
-            
+            stream = getattr(config, "stream_output", True)
+            # everything before the message just stored is prior context
+            history = config._hist_store.messages(self.current_chat_id)[:-1]
+            cancel = self.agent_router.begin_request(self.current_chat_id)
+            worker = RequestWorker(self.agent_router.current_agent, message, self.current_chat_id, stream, history, cancel,
+                                   self.recall(message))
+            worker.signals.delta.connect(self.on_reply_delta)
+            worker.signals.finished.connect(self.on_reply_received)
+            worker.signals.error.connect(self.on_reply_failed)
+            self.live_replies[self.current_chat_id] = ""
+            self.update_stop_button()
+            self.set_request_pending(1)
+            self.thread_pool.start(worker)
+
+    def openTextFileDialog(self):
+        """Ask the current model about a text file of any size.
+
+        The text in the input box is the instruction; the file is split into
+        chunks that are answered concurrently and merged into one reply.
+        """
+        if not self.agent_router.before_route() or self.current_chat_id in self.live_replies:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Open Text File", "",
+                                              "Text files (*.txt *.md *.py *.csv *.json *.log);;All files (*)")
+        if not path:
+            return
+        instruction = self.userInput.text() or "Summarize this file."
+
+        if self.is_first_input or self.current_chat_id is None:
+            self.start_new_chat()
+        user_time = datetime.now().strftime("%H:%M:%S")
+        self.add_user_message(f"[{os.path.basename(path)}] {instruction}", user_time)
+        self.userInput.clear()
+
+        cancel = self.agent_router.begin_request(self.current_chat_id)
+        worker = IngestWorker(self.agent_router.current_agent, path, instruction, self.current_chat_id, cancel,
+                              getattr(config, "INGEST_CHUNK_TOKENS", 2000), getattr(config, "INGEST_CONCURRENCY", 4))
+        worker.signals.progress.connect(self.on_ingest_progress)
+        worker.signals.finished.connect(self.on_reply_received)
+        worker.signals.error.connect(self.on_reply_failed)
+        self.live_replies[self.current_chat_id] = ""
+        self.update_stop_button()
+        self.set_request_pending(1)
+        self.thread_pool.start(worker)
+
+    def on_ingest_progress(self, chat_id, done, total):
+        self.progressBar.setRange(0, total)
+        self.progressBar.setValue(done)
+
+    def recall(self, message):
+        """Excerpts of other chats most similar to ``message``, for the prompt."""
+        if not getattr(config, "RETRIEVAL", True):
+            return []
+        # the message itself is indexed by now, and the same question asked in
+        # another chat scores about 1.0 without telling the model anything new
+        hits = config._vector_index.search(message, getattr(config, "RETRIEVAL_TOP_K", 3), self.current_chat_id,
+                                           getattr(config, "RETRIEVAL_MIN_SCORE", 0.2),
+                                           getattr(config, "RETRIEVAL_MAX_SCORE", 0.95))
+        rows = config._hist_store.messages_by_id([message_id for message_id, _, _ in hits])
+        query = ' '.join(message.split())
+        excerpts = []
+        for message_id, _, _ in hits:
+            if message_id in rows:
+                chat_id, title, sender, content = rows[message_id]
+                if ' '.join(content.split()) == query:
+                    continue
+                speaker = "User" if sender == 'user' else "Assistant"
+                excerpts.append(f"[{title}] {speaker}: {' '.join(content.split())[:600]}")
+        return excerpts
+
+    def recount_chat_tokens(self):
+        # counts are cached per message, so only a first visit to a chat tokenizes it
+        provider = self.agent_router.current_agent.provider
+        self.chat_tokens = sum(token_counter.count(m['content'], provider) + 4
+                               for m in self.contentView.transcript.messages)
+        self.update_token_count()
+
+    def add_chat_tokens(self, content):
+        self.chat_tokens += token_counter.count(content, self.agent_router.current_agent.provider) + 4
+        self.update_token_count()
+
+    def update_token_count(self):
+        provider = self.agent_router.current_agent.provider
+        text = self.userInput.text()
+        approx = "" if token_counter.is_exact(provider) else "~"
+        tokens = token_counter.count(text, provider) if text else 0
+        self.tokenLabel.setText(f"{approx}{tokens} tokens  |  chat {approx}{self.chat_tokens} tokens")
+
+    def num_tokens_from_messages(self):
+        """Count the prompt the next message would send, history and excerpts included."""
+        agent = self.agent_router.current_agent
+        agent._setup_config()
+        message = self.userInput.text()
+        history = config._hist_store.messages(self.current_chat_id) if self.current_chat_id in config._hist_cache['chats'] else []
+        messages = agent._build_messages(message, history, self.recall(message) if message else None)
+        tokens = token_counter.num_tokens_from_messages(messages, agent.provider)
+        approx = "" if token_counter.is_exact(agent.provider) else "about "
+        QMessageBox.information(self, "Prompt Tokens",
+            f"The next request sends {approx}{tokens} prompt tokens to {agent.type}:\n"
+            f"{len(messages) - 2} earlier messages of this chat fit its context window.")
+        return tokens
+
+    def exportData(self):
+        """Export every chat to a JSONL, Markdown or HTML file."""
+        self.start_export(None, "chats")
+
+    def saveData(self):
+        """Export the open chat to a JSONL, Markdown or HTML file."""
+        if self.current_chat_id not in config._hist_cache['chats']:
+            return
+        title = config._hist_cache['chats'][self.current_chat_id]['title']
+        self.start_export([self.current_chat_id], "".join(c if c.isalnum() or c in " -_" else "_" for c in title))
+
+    def start_export(self, chat_ids, name):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chats", f"{name}.md",
+                                              "Markdown (*.md);;HTML page (*.html);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        if path in self.exports:
+            return
+        cancel = CancelToken()
+        dialog = QProgressDialog(f"Exporting to {os.path.basename(path)} ...", "Cancel", 0, 0, self)
+        dialog.setWindowTitle("Export")
+        dialog.setMinimumDuration(300)
+        dialog.canceled.connect(cancel.cancel)
+        self.exports[path] = dialog
+        worker = ExportWorker(config._hist_store, path, chat_ids, cancel)
+        worker.signals.progress.connect(self.on_export_progress)
+        worker.signals.finished.connect(self.on_export_done)
+        worker.signals.error.connect(self.on_export_failed)
+        self.thread_pool.start(worker)
+
+    def on_export_progress(self, path, done, total):
+        dialog = self.exports.get(path)
+        if dialog is not None and not dialog.wasCanceled():
+            dialog.setMaximum(total)
+            dialog.setValue(done)
+
+    def on_export_done(self, path, _, stats):
+        self.exports.pop(path).deleteLater()
+        if not stats['cancelled']:
+            QMessageBox.information(self, "Export", f"{stats['messages']} messages written to {path}")
+
+    def on_export_failed(self, path, error):
+        self.exports.pop(path).deleteLater()
+        QMessageBox.warning(self, "Export", f"Export to {path} failed:\n{error}")
+
+    def printData(self):
+        """Print the open chat, formatted like the HTML export."""
+        if self.current_chat_id not in config._hist_cache['chats']:
+            return
+        from PySide6.QtGui import QTextDocument
+        from PySide6.QtPrintSupport import QPrinter, QPrintDialog
+        printer = QPrinter()
+        if QPrintDialog(printer, self).exec() != QPrintDialog.Accepted:
+            return
+        page = "".join(line for line in exporter.html_lines(exporter.iter_chats(config._hist_store, [self.current_chat_id]))
+                       if line is not None)
+        document = QTextDocument()
+        document.setHtml(page)
+        document.print_(printer)
+
+    def on_reply_delta(self, chat_id, delta):
+        if chat_id not in self.live_replies:
+            return
+        if chat_id == self.current_chat_id and self.contentView.transcript.live is None:
+            self.begin_live_block(self.live_replies[chat_id])
+        self.live_replies[chat_id] += delta
+        if chat_id == self.current_chat_id:
+            self.pending_deltas.append(delta)
+            if not self.renderTimer.isActive():
+                self.renderTimer.start()
+
+    def on_reply_received(self, chat_id, bot_msg, stats):
+        self.set_request_pending(-1)
+        self.agent_router.end_request(chat_id)
+        self.end_live_block(chat_id)
+        metrics = telemetry.build_metrics(stats['model'], stats)
+        telemetry.record(metrics)
+        meta = {'metrics': metrics}
+        if stats.get('cached'):
+            meta['cached'] = True
+        if stats.get('cancelled'):
+            meta['stopped'] = True
+            if not bot_msg:
+                return
+        bot_time = datetime.now().strftime("%H:%M:%S")
+        self.add_bot_message(bot_msg, bot_time, chat_id=chat_id, meta=meta)
+
+    def on_reply_failed(self, chat_id, error):
+        self.set_request_pending(-1)
+        self.agent_router.end_request(chat_id)
+        self.end_live_block(chat_id)
+        bot_time = datetime.now().strftime("%H:%M:%S")
+        self.add_bot_message(f"**Error:** {error}", bot_time, chat_id=chat_id, display_only=True)
+
+    def stop_generation(self):
+        self.agent_router.cancel(self.current_chat_id)
+
+    def update_stop_button(self):
+        self.stopButton.setVisible(self.current_chat_id in self.live_replies)
+
+    def begin_live_block(self, text):
+        """Open the assistant row that streamed deltas are appended to."""
+        time = datetime.now().strftime("%H:%M:%S")
+        self.contentView.transcript.begin_live(time, text)
+        self.scroll_to_bottom()
+
+    def flush_deltas(self):
+        # Deltas are painted as plain text at most once per timer tick;
+        # markdown is rendered a single time when the reply completes.
+        self.renderTimer.stop()
+        if not self.pending_deltas:
+            return
+        scrollbar = self.contentView.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        self.contentView.transcript.append_live("".join(self.pending_deltas))
+        self.pending_deltas = []
+        if at_bottom:
+            self.contentView.scrollToBottom()
+
+    def end_live_block(self, chat_id):
+        self.live_replies.pop(chat_id, None)
+        self.update_stop_button()
+        if chat_id != self.current_chat_id:
+            return
+        self.renderTimer.stop()
+        self.pending_deltas = []
+        self.contentView.transcript.end_live()
+
+    def set_request_pending(self, delta):
+        self.pending_requests += delta
+        self.progressBar.setVisible(self.pending_requests > 0)
+        if self.pending_requests == 0:
+            # back to the busy indicator after a file's determinate progress
+            self.progressBar.setRange(0, 0)
     
     def apply_minimal_theme(self):
         palette = QPalette()
@@ -324,24 +701,24 @@ class ChatWidget(QWidget):
             }
             
             /* List widget */
-            QListWidget {
+            QListWidget, #conversationList {
                 background-color: transparent;
                 color: #e0e0e0;
                 show-decoration-selected: 1;
             }
             
-            QListWidget::item {
+            QListWidget::item, #conversationList::item {
                 padding: 10px;
                 border-radius: 6px;
                 background-color: rgba(60, 60, 60, 80);
                 margin: 0;
             }
             
-            QListWidget::item:hover {
+            QListWidget::item:hover, #conversationList::item:hover {
                 background-color: rgba(80, 80, 80, 120);
             }
             
-            QListWidget::item:selected {
+            QListWidget::item:selected, #conversationList::item:selected {
                 background-color: rgba(76, 175, 80, 150);
                 color: white;
             }
@@ -371,7 +748,7 @@ class ChatWidget(QWidget):
                 background: none;
             }
                            
-            QTextEdit {
+            QTextEdit, #transcript {
                 background: rgba(0, 0, 0, 0.2);
                 border-radius: 8px;
             }
@@ -393,67 +770,49 @@ class ChatWidget(QWidget):
         if not display_only:
             self.store_message('user', message, time)
 
-        cleaned_message = message.replace("\n", "<br>").replace("  ", "&nbsp;&nbsp;")
-        bold_txt = f"""
-        <br>
-        <div>
-            <b><font size='4'>USER   {time}</font></b><br>
-            <div>
-                {cleaned_message}
-            </div>
-        </div>
-        <br>
-        """
-        self.contentView.insertHtml(bold_txt)
-
+        self.contentView.transcript.append_message({'sender': 'user', 'content': message, 'time': time})
+        self.add_chat_tokens(message)
         if not display_only:
             self.scroll_to_bottom()
 
-
-    def add_bot_message(self, message,time, display_only=False):
+    def add_bot_message(self, message,time, display_only=False, chat_id=None, meta=None):
+        if chat_id is None:
+            chat_id = self.current_chat_id
         if not display_only:
-            self.store_message('bot', message, time)
-        html_content = markdown.markdown(message)
-        bold_txt = f"""
-        <br>
-        <div>
-            <b><font size='4'>ASSISTANT   {time}</font></b><br>
-            <div>
-                {html_content}
-            </div>
-        </div>
-        <br>
-        """
-        self.contentView.insertHtml(bold_txt)
+            self.store_message('bot', message, time, chat_id, meta)
+        if chat_id != self.current_chat_id:
+            return
+
+        bot_message = {'sender': 'bot', 'content': message, 'time': time}
+        if meta:
+            bot_message['meta'] = meta
+        self.contentView.transcript.append_message(bot_message)
+        self.add_chat_tokens(message)
         if not display_only:
             self.scroll_to_bottom()
 
-    def store_message(self, sender, content, time):
-        if self.current_chat_id in config._hist_cache['chats']:
-            config._hist_cache['chats'][self.current_chat_id]['messages'].append({
-                'sender': sender,
-                'content': content,
-                'time': time
-            })
+    def store_message(self, sender, content, time, chat_id=None, meta=None):
+        if chat_id is None:
+            chat_id = self.current_chat_id
+        if chat_id in config._hist_cache['chats']:
+            chat = config._hist_cache['chats'][chat_id]
+            chat['count'] += 1
+            chat['updated'] = datetime.now().timestamp()
+            self.conversationList.update_chat(chat_id)
+            message_id = config._hist_store.append_message(chat_id, sender, content, time, meta)
+            if getattr(config, "RETRIEVAL", True):
+                config._vector_index.add(message_id, chat_id, content)
             
             if sender == 'user' and len(content) > 0:
-                if len(config._hist_cache['chats'][self.current_chat_id]['messages']) == 1:
+                if chat['count'] == 1:
                     title = content[:30] + "..." if len(content) > 30 else content
-                    config._hist_cache['chats'][self.current_chat_id]['title'] = title
-                    
-                    # Update the list item
-                    for i in range(self.conversationList.count()):
-                        item = self.conversationList.item(i)
-                        if item.data(Qt.UserRole) == self.current_chat_id:
-                            item.setText(title)
-                            break
+                    chat['title'] = title
+                    config._hist_store.set_title(chat_id, title)
+                    self.conversationList.update_chat(chat_id)
 
     def scroll_to_bottom(self):
-        scrollbar = self.contentView.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
-        QTimer.singleShot(50, lambda: scrollbar.setValue(
-            scrollbar.maximum()
-        ))
+        self.contentView.scrollToBottom()
+        QTimer.singleShot(50, self.contentView.scrollToBottom)
     
     def show_help(self):
         if self.help_window is None:
@@ -479,11 +838,40 @@ class ChatWidget(QWidget):
             self.setting_window.close()
             self.setting_window = None
 
+    def show_compare(self):
+        if self.compare_window is None:
+            self.compare_window = CompareWindow(self)
+        self.compare_window.show()
+        self.compare_window.raise_()
+        self.compare_window.activateWindow()
+
+    def show_metrics(self):
+        if self.metrics_window is None:
+            self.metrics_window = MetricsWindow(self)
+        else:
+            self.metrics_window.refresh()
+        self.metrics_window.show()
+        self.metrics_window.raise_()
+
+    def show_cache_stats(self):
+        stats = response_cache.stats()
+        QMessageBox.information(self, "Response Cache",
+            f"Hits: {stats['hits']}\nMisses: {stats['misses']}\n"
+            f"Hit rate: {stats['hit_rate']:.1%}\nIn memory: {stats['entries']} replies")
+
     def on_model_changed(self, index):
         selected_model = self.apiModels.currentText()
         self.current_model = selected_model
-        self.agent_router.switch_model(self.current_model)
+        if self.ready:
+            self.agent_router.switch_model(self.current_model)
+            self.agent_router.prewarm()
+            self.recount_chat_tokens()
     
+    def on_input_edited(self, text):
+        # the first keystroke of a message warms the provider connection
+        if self.ready and len(text) == 1:
+            self.agent_router.prewarm()
+
     def eventFilter(self, obj, event):
         if obj == self.userInput:
             if event.type() == event.Type.FocusIn:
@@ -519,24 +907,12 @@ class ChatWidget(QWidget):
         self.inputAnimation.start()
     
     def load_cached_conversations(self):
-        """Load and display cached conversations from history file"""
+        """Show cached conversations in the sidebar and open the most recent one"""
+        self.conversationList.set_chats(config._hist_cache['chats'])
         if not config._hist_cache['chats']:
             return
-        
-        self.conversationList.clear()
-        
-        sorted_chats = sorted(
-            config._hist_cache['chats'].items(),
-            key=lambda x: x[0],
-            reverse=True
-        )
-        
-        for chat_id, chat_data in sorted_chats:
-            item = QListWidgetItem(chat_data['title'])
-            item.setData(Qt.UserRole, chat_id)
-            self.conversationList.addItem(item)
-        
-        if sorted_chats:
-            self.conversationList.setCurrentRow(0)
-            self.current_chat_id = sorted_chats[0][0]
-            self.display_conversation(self.current_chat_id)
\ No newline at end of file
+
+        self.current_chat_id = max(config._hist_cache['chats'],
+                                   key=lambda chat_id: config._hist_cache['chats'][chat_id]['updated'])
+        self.conversationList.select_chat(self.current_chat_id)
+        self.display_conversation(self.current_chat_id)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import time
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton,
+                              QCheckBox, QLabel, QTextEdit, QSplitter, QFrame)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QFont, QTextCursor, QTextCharFormat
+
+import cfg.config as config
+from agent import telemetry
+from storage import render_cache
+from ui.requestWorker import RequestWorker
+
+
+class ComparePane(QFrame):
+    def __init__(self, model):
+        super().__init__()
+        self.setFrameShape(QFrame.NoFrame)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        title = QLabel(model)
+        title.setFont(QFont('Arial', 14, QFont.Bold))
+        self.view = QTextEdit()
+        self.view.setReadOnly(True)
+        self.stats = QLabel("waiting ...")
+        self.stats.setWordWrap(True)
+
+        layout.addWidget(title)
+        layout.addWidget(self.view, 1)
+        layout.addWidget(self.stats)
+        self.pending = []
+
+    def flush(self):
+        if self.pending:
+            cursor = QTextCursor(self.view.document())
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText("".join(self.pending), QTextCharFormat())
+            self.pending = []
+
+
+class CompareWindow(QWidget):
+    """Send one prompt to several models at once and show replies side by side."""
+    def __init__(self, parent):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Compare Models")
+        self.resize(1100, 650)
+        self.chat_widget = parent
+        self.panes = {}
+        self.running = set()
+        self.sent_at = 0.0
+
+        layout = QVBoxLayout(self)
+
+        model_row = QHBoxLayout()
+        self.model_boxes = {}
+        for model in config.models:
+            box = QCheckBox(model)
+            box.setChecked(self.chat_widget.agent_router.has_api_key(model))
+            self.model_boxes[model] = box
+            model_row.addWidget(box)
+        model_row.addStretch()
+        layout.addLayout(model_row)
+
+        input_row = QHBoxLayout()
+        self.promptInput = QLineEdit()
+        self.promptInput.setPlaceholderText("Prompt to send to every selected model ...")
+        self.compareButton = QPushButton("Compare")
+        input_row.addWidget(self.promptInput, 1)
+        input_row.addWidget(self.compareButton)
+        layout.addLayout(input_row)
+
+        self.paneSplitter = QSplitter(Qt.Horizontal)
+        layout.addWidget(self.paneSplitter, 1)
+
+        self.summary = QLabel("")
+        layout.addWidget(self.summary)
+
+        self.renderTimer = QTimer(self)
+        self.renderTimer.setInterval(33)
+        self.renderTimer.timeout.connect(self.flush_panes)
+
+        self.promptInput.returnPressed.connect(self.start_compare)
+        self.compareButton.clicked.connect(self.start_compare)
+
+    def start_compare(self):
+        prompt = self.promptInput.text()
+        models = [m for m, box in self.model_boxes.items() if box.isChecked()]
+        if not prompt or not models or self.running:
+            return
+
+        for pane in self.panes.values():
+            pane.setParent(None)
+            pane.deleteLater()
+        self.panes = {}
+
+        agents = self.chat_widget.agent_router.fan_out_agents(models)
+        self.sent_at = time.perf_counter()
+        self.summary.setText(f"Sent to {len(agents)} models ...")
+        for model, agent in agents.items():
+            pane = ComparePane(model)
+            self.panes[model] = pane
+            self.paneSplitter.addWidget(pane)
+
+            if not self.chat_widget.agent_router.has_api_key(model):
+                pane.stats.setText("missing API key")
+                continue
+            pane.stats.setText("streaming ...")
+            self.running.add(model)
+            worker = RequestWorker(agent, prompt, model, stream=True)
+            worker.signals.delta.connect(self.on_delta)
+            worker.signals.finished.connect(self.on_finished)
+            worker.signals.error.connect(self.on_error)
+            self.chat_widget.thread_pool.start(worker)
+        self.renderTimer.start()
+        self.update_summary()
+
+    def on_delta(self, model, delta):
+        if model in self.panes:
+            self.panes[model].pending.append(delta)
+
+    def flush_panes(self):
+        for pane in self.panes.values():
+            pane.flush()
+
+    def on_finished(self, model, reply, stats):
+        self.running.discard(model)
+        metrics = telemetry.build_metrics(stats['model'], stats)
+        telemetry.record(metrics)
+        pane = self.panes.get(model)
+        if pane is None:
+            return
+        pane.pending = []
+        pane.view.setHtml(render_cache.render(reply))
+        tokens = stats.get('completion_tokens')
+        estimated = tokens is None
+        if estimated:
+            tokens = max(1, len(reply) // 4)
+            # the rate the metrics panel would show, over the estimated count
+            metrics = telemetry.build_metrics(stats['model'], dict(stats, completion_tokens=tokens))
+        rate = metrics.get('tokens_per_sec')
+        # a cached reply was not generated, it has no rate to show
+        throughput = f", {rate:.1f} tok/s" if rate and not stats.get('cached') else ""
+        pane.stats.setText(
+            f"TTFT {stats.get('ttft', 0.0):.2f}s  |  total {stats['total']:.2f}s  |  "
+            f"{'~' if estimated else ''}{tokens} tokens{throughput}"
+            + ("  |  cached" if stats.get('cached') else "")
+        )
+        self.update_summary()
+
+    def on_error(self, model, error):
+        self.running.discard(model)
+        pane = self.panes.get(model)
+        if pane is None:
+            return
+        pane.pending = []
+        pane.stats.setText(f"error: {error}")
+        self.update_summary()
+
+    def update_summary(self):
+        if self.running:
+            return
+        self.renderTimer.stop()
+        self.summary.setText(f"All replies in {time.perf_counter() - self.sent_at:.2f}s wall clock")
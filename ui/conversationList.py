@@ -0,0 +1,204 @@
+from PySide6.QtWidgets import QListView, QAbstractItemView
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+# looking roles up on Qt costs more than the rest of data(), which the
+# view calls for every row it lays out
+DisplayRole = Qt.DisplayRole
+ChatIdRole = Qt.UserRole
+
+
+class ConversationModel(QAbstractListModel):
+    """Chats of the sidebar, most recently updated first.
+
+    Rows are handed to the view a page at a time through ``fetchMore``.
+    ``chat_rows`` maps a chat id to its row, so a new title only emits
+    ``dataChanged`` for that row; a chat that gets a message moves to the
+    top, which only renumbers the rows above it.
+
+    ``recent`` holds every chat by recency and ``order`` the rows shown:
+    the same list, or while filtering the ids whose title contains the
+    filter text, looked up in ``titles`` and paged like the full list.
+    """
+    PAGE = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chats = {}
+        self.recent = self.order = []
+        self.fetched = 0
+        self.chat_rows = {}
+        self.titles = {}
+        self.filter_text = ""
+
+    def set_chats(self, chats):
+        """Show ``chats`` ({id: {'title', 'updated', ...}}), shared with the caller."""
+        self.beginResetModel()
+        self.chats = chats
+        self.recent = self.order = sorted(chats, key=lambda chat_id: chats[chat_id]['updated'], reverse=True)
+        self.fetched = 0
+        self.chat_rows = {}
+        self.titles = {}
+        self.filter_text = ""
+        self.endResetModel()
+
+    def set_filter(self, text):
+        """Show only chats whose title contains ``text``, ignoring case."""
+        text = text.casefold()
+        if text == self.filter_text:
+            return
+        if text:
+            for chat_id in self.chats.keys() - self.titles.keys():
+                self.titles[chat_id] = self.chats[chat_id]['title'].casefold()
+            # a longer filter only narrows the matches of the one before it
+            pool = self.order if self.filter_text and self.filter_text in text else self.recent
+            titles = self.titles
+            order = [chat_id for chat_id in pool if text in titles[chat_id]]
+        else:
+            order = self.recent
+        self.beginResetModel()
+        self.order = order
+        self.filter_text = text
+        self.fetched = 0
+        self.chat_rows = {}
+        self.endResetModel()
+
+    def matches(self, chat_id):
+        if not self.filter_text:
+            return True
+        title = self.titles.get(chat_id)
+        if title is None:
+            title = self.titles[chat_id] = self.chats[chat_id]['title'].casefold()
+        return self.filter_text in title
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.fetched
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.fetched < len(self.order)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self.fetch(self.PAGE)
+
+    def fetch(self, count=None):
+        """Fetch ``count`` more rows, all remaining ones by default."""
+        last = len(self.order) if count is None else min(self.fetched + count, len(self.order))
+        if last <= self.fetched:
+            return
+        self.beginInsertRows(QModelIndex(), self.fetched, last - 1)
+        for row in range(self.fetched, last):
+            self.chat_rows[self.order[row]] = row
+        self.fetched = last
+        self.endInsertRows()
+
+    def data(self, index, role=DisplayRole):
+        if role == DisplayRole:
+            return self.chats[self.order[index.row()]]['title']
+        if role == ChatIdRole:
+            return self.order[index.row()]
+        return None
+
+    def chat_index(self, chat_id):
+        """Index of a chat, fetching the pages up to it if needed; invalid
+        for a chat the filter hides."""
+        row = self.chat_rows.get(chat_id)
+        if row is None:
+            if chat_id not in self.chats or not self.matches(chat_id):
+                return QModelIndex()
+            try:
+                row = self.order.index(chat_id)
+            except ValueError:
+                return QModelIndex()
+            self.fetch((row // self.PAGE + 1) * self.PAGE - self.fetched)
+        return self.index(row)
+
+    def move_to_top(self, chat_id):
+        """Make a chat the first one: a new chat or one that just got a message."""
+        if self.order is not self.recent:
+            if chat_id in self.recent:
+                self.recent.remove(chat_id)
+            self.recent.insert(0, chat_id)
+            if not self.matches(chat_id):
+                self._remove(chat_id)
+                return
+        row = self.chat_rows.get(chat_id)
+        if row == 0:
+            return
+        if row is None:
+            if chat_id in self.order:
+                self.order.remove(chat_id)
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self.order.insert(0, chat_id)
+            self.fetched += 1
+            row = self.fetched - 1
+            done = self.endInsertRows
+        else:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), 0)
+            self.order.insert(0, self.order.pop(row))
+            done = self.endMoveRows
+        for moved in range(row + 1):
+            self.chat_rows[self.order[moved]] = moved
+        done()
+
+    def _remove(self, chat_id):
+        # drop a chat from the filtered rows once its title no longer matches
+        row = self.chat_rows.pop(chat_id, None)
+        if row is None:
+            if chat_id in self.order:
+                self.order.remove(chat_id)
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.order[row]
+        self.fetched -= 1
+        for moved in range(row, self.fetched):
+            self.chat_rows[self.order[moved]] = moved
+        self.endRemoveRows()
+
+    def update_chat(self, chat_id):
+        """A chat's title changed or it got a message."""
+        if chat_id not in self.chats:
+            return
+        self.titles.pop(chat_id, None)
+        top = self.recent[0] if self.recent else None
+        if top is None or self.chats[chat_id]['updated'] >= self.chats[top]['updated']:
+            self.move_to_top(chat_id)
+        if chat_id in self.chat_rows:
+            index = self.index(self.chat_rows[chat_id])
+            self.dataChanged.emit(index, index, [DisplayRole])
+
+
+class ConversationList(QListView):
+    """Sidebar list of chats, filtered by title in ``conversations``."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.conversations = ConversationModel(self)
+        self.setModel(self.conversations)
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+    def set_chats(self, chats):
+        self.conversations.set_chats(chats)
+
+    def add_chat(self, chat_id):
+        self.conversations.move_to_top(chat_id)
+
+    def update_chat(self, chat_id):
+        self.conversations.update_chat(chat_id)
+
+    def set_filter(self, text):
+        current = self.currentIndex().data(ChatIdRole)
+        self.conversations.set_filter(text)
+        # the filtered rows are a new list, keep the open chat selected if shown
+        if current is not None:
+            index = self.conversations.chat_index(current)
+            if index.isValid():
+                self.setCurrentIndex(index)
+
+    def select_chat(self, chat_id):
+        index = self.conversations.chat_index(chat_id)
+        if index.isValid():
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
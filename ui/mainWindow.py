@@ -3,18 +3,29 @@ from functools import partial
 # config
 import cfg.config as config
 
+from storage import config_store
+
 # chat window
 from ui.chatWidget import ChatWidget
 
 # ui
 import qdarktheme
 from PySide6.QtGui import QGuiApplication, QAction
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import QMainWindow
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.painted = False
         self.initUI()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            # show the window first, then load the agent and the history
+            self.painted = True
+            QTimer.singleShot(0, self.chat_widget.finish_setup)
     
     def initUI(self):
         # Center Widget
@@ -181,7 +192,7 @@ class MainWindow(QMainWindow):
         # about_menu.addAction(new_action)
 
     def toggleTheme(self):
-        config.darkTheme = not config.darkTheme
+        config_store.update({"darkTheme": not config.darkTheme})
         qdarktheme.setup_theme() if config.darkTheme else qdarktheme.setup_theme('light')
 
     def bringToForeground(self,window):
@@ -0,0 +1,88 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget,
+                              QTableWidgetItem, QHeaderView, QFileDialog, QLabel)
+from PySide6.QtCore import Qt
+
+import cfg.config as config
+from agent import telemetry
+
+COLUMNS = [
+    ("Model", None, None),
+    ("Requests", None, None),
+    ("Queue p50", 'queue_wait', 'p50'),
+    ("Headers p50", 'headers', 'p50'),
+    ("TTFT p50", 'ttft', 'p50'),
+    ("TTFT p95", 'ttft', 'p95'),
+    ("Latency p50", 'total', 'p50'),
+    ("Latency p95", 'total', 'p95'),
+    ("Tok/s p50", 'tokens_per_sec', 'p50'),
+    ("Tok/s p95", 'tokens_per_sec', 'p95'),
+]
+
+
+class MetricsWindow(QWidget):
+    """Latency and throughput per model, from history and this session."""
+    def __init__(self, parent):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Request Metrics")
+        self.resize(900, 320)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.note = QLabel("")
+        layout.addWidget(self.table, 1)
+        layout.addWidget(self.note)
+
+        button_row = QHBoxLayout()
+        refresh_button = QPushButton("Refresh")
+        jsonl_button = QPushButton("Export JSONL")
+        prometheus_button = QPushButton("Export Prometheus")
+        button_row.addStretch()
+        button_row.addWidget(refresh_button)
+        button_row.addWidget(jsonl_button)
+        button_row.addWidget(prometheus_button)
+        layout.addLayout(button_row)
+
+        refresh_button.clicked.connect(self.refresh)
+        jsonl_button.clicked.connect(self.export_jsonl)
+        prometheus_button.clicked.connect(self.export_prometheus)
+        self.refresh()
+
+    def records(self):
+        merged = {m['id']: m for m in config._hist_store.metrics()}
+        for metrics in telemetry.session_records():
+            merged.setdefault(metrics['id'], metrics)
+        return sorted(merged.values(), key=lambda m: m['time'])
+
+    def refresh(self):
+        records = self.records()
+        summary = telemetry.summarize(records)
+        self.table.setRowCount(len(summary))
+        for row, (model, entry) in enumerate(summary.items()):
+            for column, (_, field, q) in enumerate(COLUMNS):
+                if column == 0:
+                    text = model
+                elif column == 1:
+                    text = str(entry['requests'])
+                else:
+                    value = entry[field][q]
+                    if value is None:
+                        text = "-"
+                    elif field == 'tokens_per_sec':
+                        text = f"{value:.1f}"
+                    else:
+                        text = f"{value:.2f}s"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+        self.note.setText(f"{len(records)} requests; cached and stopped replies are excluded from timings")
+
+    def export_jsonl(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "metrics.jsonl", "JSON Lines (*.jsonl)")
+        if path:
+            telemetry.export_jsonl(path, self.records())
+
+    def export_prometheus(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "chatgui.prom", "Prometheus (*.prom *.txt)")
+        if path:
+            telemetry.export_prometheus(path, self.records())
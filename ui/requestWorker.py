@@ -0,0 +1,140 @@
+import time
+
+from agent import ingest
+from storage import exporter
+from agent.cancellation import RequestCancelled
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+
+
+class RequestSignals(QObject):
+    delta = Signal(object, str)
+    finished = Signal(object, str, dict)
+    error = Signal(object, str)
+    progress = Signal(object, int, int)
+
+
+class RequestWorker(QRunnable):
+    """Runs a single agent call on a QThreadPool thread.
+
+    Results are delivered back to the GUI thread through ``signals``; the
+    ``chat_id`` the request belongs to travels with every signal so replies
+    land in the right conversation even if the user switched chats. With
+    ``stream`` set, every text delta is emitted as it arrives;
+    ``finished`` carries the joined reply either way. ``finished`` also carries the
+    request stats: model, queue wait, time to first token, total latency
+    and token usage.
+    ``history`` holds the chat's earlier messages for the context window
+    and ``memory`` excerpts of other chats retrieved for this message.
+    When ``cancel`` is triggered the worker stops early and ``finished``
+    carries the partial reply with ``stats['cancelled']`` set.
+    """
+    def __init__(self, agent, message, chat_id, stream=False, history=None, cancel=None, memory=None):
+        super().__init__()
+        self.memory = memory
+        self.cancel = cancel
+        self.submitted = time.perf_counter()
+        self.agent = agent
+        self.message = message
+        self.history = history
+        self.chat_id = chat_id
+        self.stream = stream
+        self.signals = RequestSignals()
+
+    @Slot()
+    def run(self):
+        start = time.perf_counter()
+        stats = {'model': self.agent.type, 'queue_wait': start - self.submitted}
+        parts = []
+        try:
+            # received as a stream either way, so Stop keeps the text that arrived
+            # before it; without ``stream`` only the whole reply is emitted
+            for delta in self.agent.stream_message(self.message, history=self.history, memory=self.memory,
+                                                   stats=stats, cancel=self.cancel):
+                if not parts:
+                    stats['ttft'] = time.perf_counter() - start
+                parts.append(delta)
+                if self.stream:
+                    self.signals.delta.emit(self.chat_id, delta)
+            reply = "".join(parts)
+        except RequestCancelled:
+            reply = "".join(parts)
+        except Exception as e:
+            if self.cancel is None or not self.cancel.cancelled:
+                self.signals.error.emit(self.chat_id, str(e))
+                return
+            reply = "".join(parts)
+        stats['total'] = time.perf_counter() - start
+        stats['cancelled'] = self.cancel is not None and self.cancel.cancelled
+        self.signals.finished.emit(self.chat_id, reply, stats)
+
+
+class IngestWorker(QRunnable):
+    """Runs ``ingest.map_reduce`` over a file on a QThreadPool thread.
+
+    Emits ``progress`` with the number of finished and scheduled requests,
+    then ``finished`` or ``error`` like RequestWorker does.
+    """
+    def __init__(self, agent, path, instruction, chat_id, cancel=None, chunk_tokens=2000, concurrency=4):
+        super().__init__()
+        self.submitted = time.perf_counter()
+        self.agent = agent
+        self.path = path
+        self.instruction = instruction
+        self.chat_id = chat_id
+        self.cancel = cancel
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = concurrency
+        self.signals = RequestSignals()
+
+    @Slot()
+    def run(self):
+        start = time.perf_counter()
+        stats = {'model': self.agent.type, 'queue_wait': start - self.submitted}
+        try:
+            reply = ingest.map_reduce(self.agent, self.path, self.instruction, self.chunk_tokens,
+                                      self.concurrency, self.on_progress, self.cancel)
+        except RequestCancelled:
+            reply = ""
+        except Exception as e:
+            if self.cancel is None or not self.cancel.cancelled:
+                self.signals.error.emit(self.chat_id, str(e))
+                return
+            reply = ""
+        stats['total'] = stats['ttft'] = time.perf_counter() - start
+        stats['cancelled'] = self.cancel is not None and self.cancel.cancelled
+        self.signals.finished.emit(self.chat_id, reply, stats)
+
+    def on_progress(self, done, total):
+        self.signals.progress.emit(self.chat_id, done, total)
+
+
+class ExportWorker(QRunnable):
+    """Runs ``exporter.export`` on a QThreadPool thread.
+
+    Signals are keyed by the target path: ``progress`` with messages done
+    and total, then ``finished`` with the message count in its stats, or
+    ``error``.
+    """
+    def __init__(self, store, path, chat_ids=None, cancel=None):
+        super().__init__()
+        self.store = store
+        self.path = path
+        self.chat_ids = chat_ids
+        self.cancel = cancel
+        self.signals = RequestSignals()
+
+    @Slot()
+    def run(self):
+        start = time.perf_counter()
+        try:
+            written = exporter.export(self.store, self.path, self.chat_ids,
+                                      progress=self.on_progress, cancel=self.cancel)
+        except Exception as e:
+            self.signals.error.emit(self.path, str(e))
+            return
+        stats = {'messages': written, 'total': time.perf_counter() - start,
+                 'cancelled': self.cancel is not None and self.cancel.cancelled}
+        self.signals.finished.emit(self.path, "", stats)
+
+    def on_progress(self, done, total):
+        self.signals.progress.emit(self.path, done, total)
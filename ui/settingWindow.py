@@ -4,6 +4,7 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton,
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon
 import cfg.config as config
+from storage import config_store
 
 class SettingWindow(QWidget):
     def __init__(self, parent=None):
@@ -119,13 +120,16 @@ class SettingWindow(QWidget):
     
     
     def save_settings(self):
+        values = {}
         for model, field in self.api_key_fields.items():
             key = field.text()
             if key:
-                setattr(config, f"{model}_API_KEY", key)
+                values[f"{model}_API_KEY"] = key
         
         if self.current_model:
-            setattr(config, f"{self.current_model.split('-')[0]}_TEMPERATURE", self.temperature.value())
-            setattr(config, f"{self.current_model.split('-')[0]}_MAX_TOKENS", self.max_tokens.value())
+            values[f"{self.current_model.split('-')[0]}_TEMPERATURE"] = self.temperature.value()
+            values[f"{self.current_model.split('-')[0]}_MAX_TOKENS"] = self.max_tokens.value()
+        # agents and pooled clients pick the changes up through config_store.subscribe
+        config_store.update(values)
         
         print("Settings saved!")
\ No newline at end of file
@@ -0,0 +1,406 @@
+import html
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import accumulate
+
+from storage import render_cache
+
+from PySide6.QtWidgets import (QStyledItemDelegate, QStyle, QStyleOptionViewItem, QAbstractItemView, QMenu,
+                               QApplication)
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QItemSelection
+from PySide6.QtGui import QTextDocument, QAbstractTextDocumentLayout, QPalette, QPainter, QRegion
+
+ContentRole = Qt.UserRole + 1
+
+
+def message_html(sender, content, time, meta=None):
+    if sender == 'user':
+        body = html.escape(content).replace("\n", "<br>").replace("  ", "&nbsp;&nbsp;")
+        return f"<b><font size='4'>USER   {time}</font></b><br>{body}"
+    note = ""
+    if meta and meta.get('cached'):
+        note += "   <i>(cached reply)</i>"
+    if meta and meta.get('stopped'):
+        note += "   <i>(stopped)</i>"
+    return f"<b><font size='4'>ASSISTANT   {time}</font></b>{note}<br>{render_cache.render(content)}"
+
+
+class TranscriptModel(QAbstractListModel):
+    """Messages of the displayed chat, rendered to HTML only when painted.
+
+    An optional live row at the end holds a reply that is still streaming;
+    it is shown as plain text until ``end_live`` drops it.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.messages = []
+        self.html_cache = {}
+        self.live = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.messages) + (self.live is not None)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if row == len(self.messages):
+            time, text = self.live
+            if role == Qt.DisplayRole:
+                body = html.escape(text).replace("\n", "<br>")
+                return f"<b><font size='4'>ASSISTANT   {time}</font></b><br>{body}"
+            if role == ContentRole:
+                return text
+            return None
+
+        message = self.messages[row]
+        if role == Qt.DisplayRole:
+            if row not in self.html_cache:
+                self.html_cache[row] = message_html(message['sender'], message['content'], message['time'], message.get('meta'))
+            return self.html_cache[row]
+        if role == ContentRole:
+            return message['content']
+        return None
+
+    def set_messages(self, messages):
+        self.beginResetModel()
+        self.messages = list(messages)
+        self.html_cache = {}
+        self.live = None
+        self.endResetModel()
+
+    def clear(self):
+        self.set_messages([])
+
+    def append_message(self, message):
+        row = len(self.messages)
+        if self.live is not None:
+            self.end_live()
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.messages.append(message)
+        self.endInsertRows()
+
+    def begin_live(self, time, text=""):
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.live = (time, text)
+        self.endInsertRows()
+
+    def append_live(self, text):
+        if self.live is None:
+            return
+        self.live = (self.live[0], self.live[1] + text)
+        index = self.index(len(self.messages))
+        self.dataChanged.emit(index, index)
+
+    def end_live(self):
+        if self.live is None:
+            return
+        row = len(self.messages)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.live = None
+        self.endRemoveRows()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Paints one message as a rich-text document.
+
+    Documents of the rows painted last are cached, so measuring a row with
+    ``height`` right before painting it lays its text out only once.
+    ``estimate`` guesses a height from the text length alone.
+    """
+    MARGIN = 10
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.docs = OrderedDict()
+
+    def reset(self):
+        self.docs.clear()
+
+    def _document(self, index, width):
+        html_text = index.data(Qt.DisplayRole)
+        key = (html_text, width)
+        doc = self.docs.get(key)
+        if doc is None:
+            doc = QTextDocument()
+            doc.setDefaultFont(self.parent().font())
+            doc.setHtml(html_text)
+            doc.setTextWidth(width)
+            self.docs[key] = doc
+            if len(self.docs) > 64:
+                self.docs.popitem(last=False)
+        else:
+            self.docs.move_to_end(key)
+        return doc
+
+    def estimator(self, width):
+        """A function guessing the height of a text at ``width`` from its length."""
+        metrics = self.parent().fontMetrics()
+        per_line = max(1, (width - 2 * self.MARGIN) // max(1, metrics.averageCharWidth()))
+        spacing = metrics.lineSpacing()
+        margins = 2 * self.MARGIN
+        return lambda text: (2 + text.count("\n") + len(text) // per_line) * spacing + margins
+
+    def height(self, index, width):
+        doc = self._document(index, max(50, width) - 2 * self.MARGIN)
+        return int(doc.size().height()) + 2 * self.MARGIN
+
+    def paint(self, painter, option, index):
+        width = max(50, option.rect.width()) - 2 * self.MARGIN
+        doc = self._document(index, width)
+        height = int(doc.size().height())
+
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.color(QPalette.AlternateBase))
+
+        painter.save()
+        painter.translate(option.rect.left() + self.MARGIN, option.rect.top() + self.MARGIN)
+        painter.setClipRect(0, 0, width, height)
+        context = QAbstractTextDocumentLayout.PaintContext()
+        context.palette.setColor(QPalette.Text, option.palette.color(QPalette.Text))
+        doc.documentLayout().draw(painter, context)
+        painter.restore()
+
+
+class TranscriptView(QAbstractItemView):
+    """Scrolling list of messages that only lays out the rows on screen.
+
+    ``heights`` holds every row's height, estimated from its text until the
+    row is first painted and measured then; ``offsets`` is their running
+    sum, so the rows under the viewport are found by binary search. A
+    corrected height only invalidates the offsets after its row, and those
+    are summed again once before the next paint. Rows are measured right
+    before they are painted, so a repaint never triggers another layout.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # set before setModel, which already calls updateGeometries
+        self.layout_width = 0
+        self.heights = []
+        self.measured = []
+        self.offsets = [0]
+        self.dirty = 0
+        self.painting = False
+        self.transcript = TranscriptModel(self)
+        self.delegate = MessageDelegate(self)
+        self.setModel(self.transcript)
+        self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        self.transcript.modelReset.connect(self.on_reset)
+        self.transcript.rowsInserted.connect(self.on_rows_inserted)
+        self.transcript.rowsRemoved.connect(self.on_rows_removed)
+        self.transcript.dataChanged.connect(self.on_data_changed)
+
+    # row heights and offsets
+
+    def _estimate(self, row):
+        text = self.transcript.data(self.transcript.index(row), ContentRole) or ""
+        return self.delegate.estimator(self.layout_width)(text)
+
+    def on_reset(self):
+        self.delegate.reset()
+        self.layout_width = self.viewport().width()
+        estimate = self.delegate.estimator(self.layout_width)
+        self.heights = [estimate(m['content']) for m in self.transcript.messages]
+        if self.transcript.live is not None:
+            self.heights.append(estimate(self.transcript.live[1]))
+        self.measured = [False] * len(self.heights)
+        self.offsets = [0] * (len(self.heights) + 1)
+        self.dirty = 0
+        self.updateGeometries()
+
+    def on_rows_inserted(self, parent, first, last):
+        count = last - first + 1
+        self.heights[first:first] = [self._estimate(row) for row in range(first, last + 1)]
+        self.measured[first:first] = [False] * count
+        self.offsets.extend([0] * count)
+        self.dirty = min(self.dirty, first)
+        self.updateGeometries()
+
+    def on_rows_removed(self, parent, first, last):
+        del self.heights[first:last + 1]
+        del self.measured[first:last + 1]
+        del self.offsets[len(self.heights) + 1:]
+        self.dirty = min(self.dirty, first)
+        self.updateGeometries()
+
+    def on_data_changed(self, top, bottom, roles=()):
+        # the live row grows with every delta; it is measured again when painted
+        for row in range(top.row(), bottom.row() + 1):
+            self._set_height(row, self._estimate(row))
+            self.measured[row] = False
+        self.updateGeometries()
+        self.viewport().update()
+
+    def _set_height(self, row, height):
+        if height != self.heights[row]:
+            self.heights[row] = height
+            self.dirty = min(self.dirty, row)
+
+    def _offsets(self):
+        if self.dirty < len(self.heights):
+            start = self.dirty
+            self.offsets[start + 1:] = accumulate(self.heights[start:], initial=self.offsets[start])
+            del self.offsets[start + 1]
+        self.dirty = len(self.heights)
+        return self.offsets
+
+    def _row_at(self, y):
+        return min(len(self.heights) - 1, max(0, bisect_right(self._offsets(), y) - 1))
+
+    def _measure_visible(self):
+        """Measure the rows under the viewport until no unmeasured row is left there."""
+        width = self.viewport().width()
+        if width != self.layout_width:
+            # heights at the old width stay as estimates, rows are measured again when shown
+            self.layout_width = width
+            self.measured = [False] * len(self.heights)
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        while self.heights:
+            top = scrollbar.value()
+            rows = [row for row in range(self._row_at(top), self._row_at(top + self.viewport().height()) + 1)
+                    if not self.measured[row]]
+            if not rows:
+                return
+            for row in rows:
+                self.measured[row] = True
+                self._set_height(row, self.delegate.height(self.transcript.index(row), width))
+            self.updateGeometries()
+            if at_bottom:
+                scrollbar.setValue(scrollbar.maximum())
+
+    # QAbstractItemView
+
+    def updateGeometries(self):
+        height = self.viewport().height()
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setRange(0, max(0, self._offsets()[-1] - height))
+        scrollbar.setPageStep(height)
+        scrollbar.setSingleStep(3 * self.fontMetrics().lineSpacing())
+        super().updateGeometries()
+
+    def paintEvent(self, event):
+        self.painting = True
+        try:
+            self._measure_visible()
+        finally:
+            self.painting = False
+        if not self.heights:
+            return
+        top = self.verticalScrollBar().value()
+        bottom = top + self.viewport().height()
+        offsets = self._offsets()
+        width = self.viewport().width()
+        selection = self.selectionModel()
+        painter = QPainter(self.viewport())
+        row = self._row_at(top)
+        while row < len(self.heights) and offsets[row] < bottom:
+            index = self.transcript.index(row)
+            option = QStyleOptionViewItem()
+            self.initViewItemOption(option)
+            option.rect = QRect(0, offsets[row] - top, width, self.heights[row])
+            if selection.isSelected(index):
+                option.state |= QStyle.State_Selected
+            self.delegate.paint(painter, option, index)
+            row += 1
+        painter.end()
+
+    def scrollContentsBy(self, dx, dy):
+        # paintEvent draws with the final position after measuring rows
+        if not self.painting:
+            self.viewport().update()
+
+    def visualRect(self, index):
+        if not index.isValid() or index.row() >= len(self.heights):
+            return QRect()
+        top = self._offsets()[index.row()] - self.verticalScrollBar().value()
+        return QRect(0, top, self.viewport().width(), self.heights[index.row()])
+
+    def indexAt(self, point):
+        y = point.y() + self.verticalScrollBar().value()
+        if not self.heights or y < 0 or y >= self._offsets()[-1]:
+            return QModelIndex()
+        return self.transcript.index(self._row_at(y))
+
+    def scrollTo(self, index, hint=QAbstractItemView.EnsureVisible):
+        if not index.isValid() or index.row() >= len(self.heights):
+            return
+        top = self._offsets()[index.row()]
+        height = self.heights[index.row()]
+        view_height = self.viewport().height()
+        scrollbar = self.verticalScrollBar()
+        if hint == QAbstractItemView.PositionAtTop:
+            value = top
+        elif hint == QAbstractItemView.PositionAtBottom:
+            value = top + height - view_height
+        elif hint == QAbstractItemView.PositionAtCenter:
+            value = top - (view_height - height) // 2
+        elif top < scrollbar.value():
+            value = top
+        elif top + height > scrollbar.value() + view_height:
+            value = min(top, top + height - view_height)
+        else:
+            return
+        scrollbar.setValue(value)
+
+    def moveCursor(self, action, modifiers):
+        count = len(self.heights)
+        if not count:
+            return QModelIndex()
+        current = self.currentIndex()
+        row = current.row() if current.isValid() else 0
+        page = self.viewport().height()
+        if action in (QAbstractItemView.MoveUp, QAbstractItemView.MovePrevious):
+            row -= 1
+        elif action in (QAbstractItemView.MoveDown, QAbstractItemView.MoveNext):
+            row += 1
+        elif action == QAbstractItemView.MovePageUp:
+            row = self._row_at(self._offsets()[row] - page)
+        elif action == QAbstractItemView.MovePageDown:
+            row = self._row_at(self._offsets()[row] + page)
+        elif action == QAbstractItemView.MoveHome:
+            row = 0
+        elif action == QAbstractItemView.MoveEnd:
+            row = count - 1
+        return self.transcript.index(max(0, min(count - 1, row)))
+
+    def horizontalOffset(self):
+        return 0
+
+    def verticalOffset(self):
+        return self.verticalScrollBar().value()
+
+    def isIndexHidden(self, index):
+        return False
+
+    def setSelection(self, rect, flags):
+        if not self.heights:
+            return
+        value = self.verticalScrollBar().value()
+        first = self._row_at(rect.top() + value)
+        last = self._row_at(rect.bottom() + value)
+        self.selectionModel().select(
+            QItemSelection(self.transcript.index(first), self.transcript.index(last)), flags)
+
+    def visualRegionForSelection(self, selection):
+        region = QRegion()
+        for selected in selection.indexes():
+            region += self.visualRect(selected)
+        return region
+
+    def show_context_menu(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy Message")
+        if menu.exec(self.viewport().mapToGlobal(pos)) == copy_action:
+            QApplication.clipboard().setText(index.data(ContentRole))